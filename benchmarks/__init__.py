@@ -0,0 +1,10 @@
+"""Benchmarks, run as `python -m benchmarks.<name>` from the repo root.
+
+Placeholder settings let them import src.config without a .env, the environment still
+wins. Nothing connects to these URLs unless a benchmark says it needs a database or Redis.
+"""
+import os
+
+
+for key, value in {"DATABASE_URL": "postgresql+asyncpg://bench@localhost/bench", "REDIS_URL": "redis://localhost", "JWT_SECRET": "bench", "JWT_ALGORITHM": "HS256"}.items():
+    os.environ.setdefault(key, value)
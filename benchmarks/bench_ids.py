@@ -0,0 +1,102 @@
+"""Snowflake ids per second, spin-waiting generator vs the slot-reserving one, across threads and processes.
+
+Every run also checks that no id was issued twice. Processes get distinct shard ids,
+as the Redis lease would give them.
+
+Usage: python -m benchmarks.bench_ids [ids] [threads] [processes]
+"""
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+import json
+import sys
+import threading
+import time
+
+from src.lib.snowflake import EPOCH, Snowflake
+
+
+class LegacySnowflake:
+    """The generator before the rewrite: one id per lock, spinning when a millisecond runs out."""
+
+    def __init__(self, shard_id: int):
+        self.shard_id = shard_id
+        self.last_timestamp = -1
+        self.sequence = 0
+        self.lock = threading.Lock()
+
+    def next_id(self) -> int:
+        with self.lock:
+            now_ms = int(time.time() * 1000)
+
+            if now_ms == self.last_timestamp:
+                self.sequence = (self.sequence + 1) & 1023
+                if self.sequence == 0:
+                    while now_ms <= self.last_timestamp:
+                        now_ms = int(time.time() * 1000)
+            else:
+                self.sequence = 0
+
+            self.last_timestamp = now_ms
+            return ((now_ms - EPOCH) << 23) | (self.shard_id << 10) | self.sequence
+
+    def next_ids(self, count: int) -> list[int]:
+        return [self.next_id() for _ in range(count)]
+
+
+GENERATORS = {"legacy": LegacySnowflake, "current": Snowflake}
+
+
+def generate(generator, count: int, batch: int) -> list[int]:
+    if batch == 1:
+        return [generator.next_id() for _ in range(count)]
+    return [id for _ in range(count // batch) for id in generator.next_ids(batch)]
+
+
+def run_threads(name: str, count: int, threads: int, batch: int) -> dict:
+    generator = GENERATORS[name](1)
+    per_thread = count // threads
+
+    start_time = time.perf_counter()
+    with ThreadPoolExecutor(threads) as executor:
+        chunks = list(executor.map(lambda _: generate(generator, per_thread, batch), range(threads)))
+    elapsed = time.perf_counter() - start_time
+
+    ids = [id for chunk in chunks for id in chunk]
+    return {"ids_per_sec": round(len(ids) / elapsed), "duplicates": len(ids) - len(set(ids))}
+
+
+def process_worker(args: tuple) -> tuple[float, list[int]]:
+    name, shard_id, count, batch = args
+    generator = GENERATORS[name](shard_id)
+    start_time = time.perf_counter()
+    ids = generate(generator, count, batch)
+    return time.perf_counter() - start_time, ids
+
+
+def run_processes(name: str, count: int, processes: int, batch: int) -> dict:
+    with ProcessPoolExecutor(processes) as executor:
+        results = list(executor.map(process_worker, [(name, shard_id, count // processes, batch) for shard_id in range(1, processes + 1)]))
+
+    ids = [id for _, chunk in results for id in chunk]
+    elapsed = max(seconds for seconds, _ in results)
+    return {"ids_per_sec": round(len(ids) / elapsed), "duplicates": len(ids) - len(set(ids))}
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    threads = int(sys.argv[2]) if len(sys.argv) > 2 else 4
+    processes = int(sys.argv[3]) if len(sys.argv) > 3 else 4
+
+    results = {}
+    for name in GENERATORS:
+        results[name] = {
+            "single_thread": run_threads(name, count, 1, 1),
+            f"{threads}_threads": run_threads(name, count, threads, 1),
+            f"{threads}_threads_batch_1000": run_threads(name, count, threads, 1000),
+            f"{processes}_processes": run_processes(name, count, processes, 1),
+        }
+
+    print(json.dumps({"ids": count, "results": results}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
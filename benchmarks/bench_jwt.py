@@ -0,0 +1,42 @@
+"""Token encode and decode throughput per JWT backend, with and without the verified-claims cache.
+
+Usage: python -m benchmarks.bench_jwt [rounds]
+"""
+import json
+import os
+import sys
+import timeit
+
+from src.lib import utils
+
+
+def ops_per_sec(func, rounds: int) -> int:
+    best = min(timeit.repeat(func, number=rounds, repeat=5))
+    return round(rounds / best)
+
+
+def main():
+    rounds = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    results = {}
+
+    for backend in ("jose", "pyjwt"):
+        utils.jwt_encode, utils.jwt_decode, utils.JWTExpiredError, utils.JWTInvalidError = utils.load_jwt_backend(backend)
+        token = utils.encode_jwt_token(user_id=4010786836870857732, token_type="access")
+        invalid_token = token[:-4] + "AAAA"
+
+        def decode_uncached():
+            utils.jwt_claims_cache.clear()
+            utils.decode_jwt_token(token)
+
+        results[backend] = {
+            "encode_per_sec": ops_per_sec(lambda: utils.encode_jwt_token(user_id=4010786836870857732, token_type="access"), rounds),
+            "decode_per_sec": ops_per_sec(decode_uncached, rounds),
+            "decode_cached_per_sec": ops_per_sec(lambda: utils.decode_jwt_token(token), rounds),
+            "decode_invalid_per_sec": ops_per_sec(lambda: utils.decode_jwt_token(invalid_token), rounds),
+        }
+
+    print(json.dumps({"algorithm": os.environ["JWT_ALGORITHM"], "rounds": rounds, "results": results}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+"""Requests per second through the middleware chain, bare app vs BaseHTTPMiddleware chain vs pure ASGI chain.
+
+Requests are driven in-process against the ASGI app, so only framework and middleware
+cost is measured. Access logs are below the default root level and never emitted.
+
+Usage: python -m benchmarks.bench_middlewares [requests] [concurrency]
+"""
+import asyncio
+import json
+import sys
+import time
+
+from fastapi import FastAPI, Request
+from fastapi.middleware.cors import CORSMiddleware
+from fastapi.middleware.trustedhost import TrustedHostMiddleware
+
+from src.lib.middlewares import register_middlewares
+from src.lib.response import CachedSuccessResponse
+
+
+BOOK_JSON = json.dumps({"id": "4010786836870857732", "title": "Book", "author": "Author", "rating_histogram": [0] * 5})
+
+
+def make_app() -> FastAPI:
+    app = FastAPI()
+
+    @app.get("/hello")
+    def say_hello(name: str = "User") -> dict:
+        return {"message": f"Hello, {name}!"}
+
+    @app.get("/api/v1/books/{book_id}")
+    async def get_book(book_id: int):
+        return CachedSuccessResponse(status=200, message="Book fetched successfully!", data=BOOK_JSON)
+
+    return app
+
+
+def legacy_app() -> FastAPI:
+    """The chain before the rewrite: an @app.middleware("http") timer plus CORS and TrustedHost."""
+    app = make_app()
+
+    @app.middleware("http")
+    async def custom_logging(request: Request, call_next):
+        start_time = time.time()
+        response = await call_next(request)
+        round(time.time() - start_time, 4)
+        return response
+
+    app.add_middleware(CORSMiddleware, allow_origins=["*"], allow_methods=["*"], allow_headers=["*"], allow_credentials=True)
+    app.add_middleware(TrustedHostMiddleware, allowed_hosts=["localhost"])
+    return app
+
+
+def asgi_app() -> FastAPI:
+    app = make_app()
+    register_middlewares(app)
+    return app
+
+
+async def call(app, path: str):
+    scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "GET", "scheme": "http",
+        "path": path, "raw_path": path.encode(), "root_path": "", "query_string": b"",
+        "headers": [(b"host", b"localhost"), (b"origin", b"http://localhost")],
+        "client": ("127.0.0.1", 50000), "server": ("localhost", 80),
+    }
+    status = None
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        nonlocal status
+        if message["type"] == "http.response.start":
+            status = message["status"]
+
+    await app(scope, receive, send)
+    return status
+
+
+async def run(app, path: str, requests: int, concurrency: int) -> float:
+    assert await call(app, path) == 200
+
+    async def worker(count: int):
+        for _ in range(count):
+            await call(app, path)
+
+    start_time = time.perf_counter()
+    await asyncio.gather(*(worker(requests // concurrency) for _ in range(concurrency)))
+    return (requests // concurrency * concurrency) / (time.perf_counter() - start_time)
+
+
+async def main():
+    requests = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    concurrency = int(sys.argv[2]) if len(sys.argv) > 2 else 10
+    apps = {"bare": make_app(), "base_http": legacy_app(), "asgi": asgi_app()}
+
+    results = {}
+    for path in ("/hello", "/api/v1/books/4010786836870857732"):
+        rps = {name: round(await run(app, path, requests, concurrency)) for name, app in apps.items()}
+        results[path] = {
+            "rps": rps,
+            "base_http_vs_bare": round(rps["base_http"] / rps["bare"], 3),
+            "asgi_vs_bare": round(rps["asgi"] / rps["bare"], 3),
+        }
+
+    print(json.dumps({"requests": requests, "concurrency": concurrency, "results": results}, indent=2))
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,61 @@
+"""Sign-in hashing throughput and event loop stall while sign-ins run.
+
+Usage: python -m benchmarks.bench_passwords [signins] [concurrency]
+"""
+import asyncio
+import json
+import statistics
+import sys
+import time
+
+from src.lib.utils import get_passwd_context, verify_password
+
+
+async def probe(latencies: list, stop: asyncio.Event, interval: float = 0.005):
+    """Stand-in for unrelated requests: measures how late the loop wakes up."""
+    while not stop.is_set():
+        start_time = time.perf_counter()
+        await asyncio.sleep(interval)
+        latencies.append(time.perf_counter() - start_time - interval)
+
+
+async def run(mode: str, signins: int, concurrency: int, hashed: str) -> dict:
+    latencies, stop = [], asyncio.Event()
+    probe_task = asyncio.create_task(probe(latencies, stop))
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def signin():
+        async with semaphore:
+            if mode == "inline":
+                get_passwd_context().verify("Example@123", hashed)
+            else:
+                await verify_password("Example@123", hashed)
+
+    start_time = time.perf_counter()
+    await asyncio.gather(*(signin() for _ in range(signins)))
+    elapsed = time.perf_counter() - start_time
+    stop.set()
+    await probe_task
+
+    quantiles = statistics.quantiles(latencies, n=100) if len(latencies) > 1 else latencies * 99
+    return {
+        "mode": mode,
+        "signins_per_sec": round(signins / elapsed, 2),
+        "probe_samples": len(latencies),
+        "probe_p50_ms": round(quantiles[49] * 1000, 3),
+        "probe_p99_ms": round(quantiles[98] * 1000, 3),
+        "probe_max_ms": round(max(latencies) * 1000, 3),
+    }
+
+
+async def main():
+    signins = int(sys.argv[1]) if len(sys.argv) > 1 else 40
+    concurrency = int(sys.argv[2]) if len(sys.argv) > 2 else 8
+    hashed = get_passwd_context().hash("Example@123")
+
+    results = [await run(mode, signins, concurrency, hashed) for mode in ("inline", "offloaded")]
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,63 @@
+"""Serialization cost of a 1,000-book list response, old envelope path vs SuccessResponse.
+
+Usage: python -m benchmarks.bench_responses [books] [rounds]
+"""
+from datetime import date, datetime, timezone
+from types import SimpleNamespace
+from typing import List
+import json
+import sys
+import timeit
+
+from fastapi.responses import JSONResponse
+from pydantic import TypeAdapter
+
+from src.books.schemas import BookModel
+from src.lib.response import ResponseModel, SuccessResponse
+
+
+book_adapter = TypeAdapter(List[BookModel])
+
+
+def make_rows(count: int) -> list:
+    now = datetime.now(timezone.utc)
+    return [
+        SimpleNamespace(
+            id=4010786836870857732 + i, title=f"Book {i}", subtitle="A subtitle", description="A description " * 10,
+            thumbnail=None, author="Author", publisher="Publisher", published=date(2020, 1, 1), pages=320,
+            language="en", review_count=0, rating_avg=0.0, rating_histogram=[0] * 5, created_at=now, updated_at=now,
+        )
+        for i in range(count)
+    ]
+
+
+def old_path(rows: list) -> bytes:
+    books_data = book_adapter.validate_python(rows, from_attributes=True)
+    books_data = book_adapter.dump_python(books_data, mode="json")
+    content = ResponseModel(success=True, message="Books fetched successfully!", data=books_data)
+    return JSONResponse(status_code=200, content=content.model_dump(exclude_none=True)).body
+
+
+def new_path(rows: list) -> bytes:
+    books_data = book_adapter.validate_python(rows, from_attributes=True)
+    return SuccessResponse(status=200, message="Books fetched successfully!", data=books_data).body
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+    rounds = int(sys.argv[2]) if len(sys.argv) > 2 else 50
+    rows = make_rows(count)
+
+    assert json.loads(old_path(rows)) == json.loads(new_path(rows))
+
+    results = {}
+    for name, path in (("old", old_path), ("new", new_path)):
+        best = min(timeit.repeat(lambda: path(rows), number=rounds, repeat=5)) / rounds
+        results[name] = {"ms_per_response": round(best * 1000, 3), "bytes": len(path(rows))}
+
+    results["speedup"] = round(results["old"]["ms_per_response"] / results["new"]["ms_per_response"], 2)
+    print(json.dumps({"books": count, **results}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
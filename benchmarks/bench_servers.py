@@ -0,0 +1,100 @@
+"""Requests per second for each server preset, serving /hello and a cached book detail.
+
+Starts the app through src.server.run with each preset's settings in a subprocess and
+drives it over keep-alive HTTP/1.1 connections. The served app is the middleware chain
+from bench_middlewares, so no database or Redis is needed.
+
+Usage: python -m benchmarks.bench_servers [seconds] [connections] [workers]
+"""
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import time
+
+from benchmarks.bench_middlewares import asgi_app
+from src.config import available_cpus
+
+
+app = asgi_app()
+
+PORT = 8765
+
+PRESETS = {
+    "uvicorn-asyncio-h11": {"SERVER": "uvicorn", "SERVER_LOOP": "asyncio", "SERVER_HTTP": "h11"},
+    "uvicorn-uvloop-httptools": {"SERVER": "uvicorn", "SERVER_LOOP": "uvloop", "SERVER_HTTP": "httptools"},
+    "granian-asyncio": {"SERVER": "granian", "SERVER_LOOP": "asyncio"},
+    "granian-uvloop": {"SERVER": "granian", "SERVER_LOOP": "uvloop"},
+}
+
+PATHS = ["/hello", "/api/v1/books/4010786836870857732"]
+
+
+async def connection(path: str, deadline: float, latencies: list):
+    reader, writer = await asyncio.open_connection("127.0.0.1", PORT)
+    request = f"GET {path} HTTP/1.1\r\nHost: localhost\r\n\r\n".encode()
+
+    try:
+        while time.perf_counter() < deadline:
+            start_time = time.perf_counter()
+            writer.write(request)
+            headers = await reader.readuntil(b"\r\n\r\n")
+            length = next(int(line.split(b":")[1]) for line in headers.split(b"\r\n") if line.lower().startswith(b"content-length"))
+            await reader.readexactly(length)
+            latencies.append(time.perf_counter() - start_time)
+    finally:
+        writer.close()
+
+
+async def drive(path: str, seconds: float, connections: int) -> dict:
+    latencies = []
+    deadline = time.perf_counter() + seconds
+    await asyncio.gather(*(connection(path, deadline, latencies) for _ in range(connections)))
+
+    latencies.sort()
+    return {
+        "rps": round(len(latencies) / seconds),
+        "p50_ms": round(latencies[len(latencies) // 2] * 1000, 3),
+        "p99_ms": round(latencies[int(len(latencies) * 0.99)] * 1000, 3),
+    }
+
+
+async def wait_ready(timeout: float = 20):
+    deadline = time.perf_counter() + timeout
+    while time.perf_counter() < deadline:
+        try:
+            _, writer = await asyncio.open_connection("127.0.0.1", PORT)
+            writer.close()
+            return
+        except OSError:
+            await asyncio.sleep(0.2)
+    raise RuntimeError("server did not start")
+
+
+async def main():
+    seconds = float(sys.argv[1]) if len(sys.argv) > 1 else 10
+    connections = int(sys.argv[2]) if len(sys.argv) > 2 else 64
+    workers = sys.argv[3] if len(sys.argv) > 3 else "1"
+
+    results = {}
+    for name, preset in PRESETS.items():
+        env = {**os.environ, **preset, "ENVIRONMENT": "production", "HOST": "127.0.0.1", "PORT": str(PORT), "WORKERS": workers, "LOG_LEVEL": "WARNING"}
+        server = subprocess.Popen(
+            [sys.executable, "-c", "from src.server import run; run('benchmarks.bench_servers:app')"],
+            env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+        )
+
+        try:
+            await wait_ready()
+            await drive(PATHS[0], 1, connections)
+            results[name] = {path: await drive(path, seconds, connections) for path in PATHS}
+        finally:
+            server.terminate()
+            server.wait(timeout=30)
+
+    print(json.dumps({"seconds": seconds, "connections": connections, "workers": workers, "cpus": available_cpus(), "results": results}, indent=2))
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,98 @@
+"""Signups per second and SQL statements per signup against the configured database.
+
+Compares one create_user call per signup under the old username hook, which looped
+SELECTs until a random suffix was free, with the current id based hook and with the
+batch import path. Needs a migrated database at DATABASE_URL. Bcrypt rounds default
+to 4 here so the numbers show database cost, override with BCRYPT_ROUNDS.
+
+Usage: python -m benchmarks.bench_signups [signups] [batch_size]
+"""
+import asyncio
+import json
+import os
+import sys
+import time
+import uuid
+
+os.environ.setdefault("BCRYPT_ROUNDS", "4")
+
+import sqlalchemy as sa
+from sqlalchemy import event
+from sqlmodel import delete
+
+from src.auth.schemas import UserSignupModel
+from src.auth.services import UserService
+from src.db.main import async_engine, async_session
+from src.db.models import User, set_unique_username
+from src.lib.utils import generate_suffix
+
+
+statements = {"count": 0}
+
+
+@event.listens_for(async_engine.sync_engine, "before_cursor_execute")
+def count_statement(*args):
+    statements["count"] += 1
+
+
+def legacy_username(mapper, connection, target: User):
+    """The username hook before the id based one, one SELECT per candidate."""
+    if not target.username or target.username.strip() == "":
+        local_part = target.email.split("@")[0].split(".")[0]
+        candidate = f"{local_part}_{generate_suffix()}"
+        while connection.execute(sa.text("SELECT 1 FROM users WHERE username = :u"), {"u": candidate}).first():
+            candidate = f"{local_part}_{generate_suffix()}"
+        target.username = candidate
+
+
+def make_users(run_id: str, mode: str, count: int) -> list[UserSignupModel]:
+    return [UserSignupModel(name="Bench User", email=f"bench.{run_id}.{mode}.{i}@example.com", password="Example@123") for i in range(count)]
+
+
+async def run(mode: str, users: list[UserSignupModel], batch_size: int) -> dict:
+    if mode == "legacy":
+        event.remove(User, "before_insert", set_unique_username)
+        event.listen(User, "before_insert", legacy_username)
+
+    statements["count"] = 0
+    start_time = time.perf_counter()
+
+    try:
+        async with async_session() as session:
+            if mode == "batch":
+                for i in range(0, len(users), batch_size):
+                    await UserService.create_users(users[i:i + batch_size], session)
+            else:
+                for user in users:
+                    await UserService.create_user(user, session)
+    finally:
+        if mode == "legacy":
+            event.remove(User, "before_insert", legacy_username)
+            event.listen(User, "before_insert", set_unique_username)
+
+    elapsed = time.perf_counter() - start_time
+    return {
+        "mode": mode,
+        "signups": len(users),
+        "signups_per_sec": round(len(users) / elapsed, 2),
+        "statements_per_signup": round(statements["count"] / len(users), 3),
+    }
+
+
+async def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+    batch_size = int(sys.argv[2]) if len(sys.argv) > 2 else 100
+    run_id = uuid.uuid4().hex[:8]
+
+    try:
+        results = [await run(mode, make_users(run_id, mode, count), batch_size) for mode in ("legacy", "single", "batch")]
+        print(json.dumps(results, indent=2))
+    finally:
+        async with async_session() as session:
+            await session.exec(delete(User).where(User.email.like(f"bench.{run_id}.%")))
+            await session.commit()
+        await async_engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,72 @@
+"""Worker cold start: app import time in fresh interpreters, and lifespan startup per DB_STARTUP mode.
+
+The import numbers need no services. "eager" imports passlib and itsdangerous up front, as the
+app did before they were deferred. Lifespan startup runs against DATABASE_URL and REDIS_URL and
+is skipped unless --lifespan is given.
+
+Usage: python -m benchmarks.bench_startup [runs] [--lifespan]
+"""
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+
+IMPORT_SCRIPT = """
+import time
+started = time.perf_counter()
+{preload}
+import src.app
+print(time.perf_counter() - started)
+"""
+
+LIFESPAN_SCRIPT = """
+import asyncio
+from src.app import app, life_span, import_seconds
+from src.lib.metrics import startup_seconds
+
+async def main():
+    async with life_span(app):
+        print(import_seconds, startup_seconds.labels("startup")._value.get())
+
+asyncio.run(main())
+"""
+
+IMPORT_VARIANTS = {
+    "eager": "import passlib.context, itsdangerous",
+    "lazy": "",
+}
+
+
+def run_script(script: str, env: dict | None = None) -> list[float]:
+    output = subprocess.run([sys.executable, "-c", script], env={**os.environ, **(env or {})}, capture_output=True, text=True, check=True).stdout
+    return [float(value) for value in output.split()]
+
+
+def summary(samples: list[float]) -> dict:
+    return {"median_ms": round(statistics.median(samples) * 1000, 1), "min_ms": round(min(samples) * 1000, 1)}
+
+
+def main():
+    runs = int(sys.argv[1]) if len(sys.argv) > 1 and sys.argv[1].isdigit() else 10
+    os.environ["LOG_LEVEL"] = "WARNING"
+
+    results = {"import": {}}
+    for name, preload in IMPORT_VARIANTS.items():
+        results["import"][name] = summary([run_script(IMPORT_SCRIPT.format(preload=preload))[0] for _ in range(runs)])
+
+    if "--lifespan" in sys.argv:
+        results["startup"] = {}
+        for mode in ("create_all", "check"):
+            samples = [run_script(LIFESPAN_SCRIPT, {"DB_STARTUP": mode}) for _ in range(runs)]
+            results["startup"][mode] = {
+                "import": summary([sample[0] for sample in samples]),
+                "startup": summary([sample[1] for sample in samples]),
+            }
+
+    print(json.dumps({"runs": runs, "results": results}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
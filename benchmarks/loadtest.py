@@ -0,0 +1,264 @@
+"""Load test for the auth, books and reviews endpoints, reports RPS and latency percentiles as JSON.
+
+Seeds users, books and reviews straight into the database, then drives sign-in, book
+listing, book detail, review creation and token refresh at a fixed concurrency. Every
+virtual user owns one seeded account, so refresh tokens never race. Seed rows are
+removed afterwards unless --keep is given.
+
+Postgres and Redis come from DATABASE_URL and REDIS_URL, e.g. the compose services:
+
+    docker compose up -d db redis-stack
+    alembic upgrade head
+    python -m benchmarks.loadtest --users 100 --books 2000 --reviews 10000 --concurrency 20
+
+Without --url the app runs in process through httpx's ASGI transport; with --url the
+requests go to a running server that shares the same database and Redis. Pass
+--baseline with an earlier --output file to fail (exit 1) when RPS drops or p95 grows
+by more than --tolerance, which keeps CI runs comparable.
+"""
+from datetime import date, timedelta
+from contextlib import asynccontextmanager
+import argparse
+import asyncio
+import json
+import os
+import random
+import sys
+import time
+import uuid
+
+# Keep in-process app logs off stdout, which carries the report
+os.environ.setdefault("LOG_LEVEL", "WARNING")
+os.environ.setdefault("LOG_ACCESS_LEVEL", "WARNING")
+
+import httpx
+from sqlmodel import delete, insert, or_
+
+from src.lib.utils import generate_ids, generate_passwd_hash, to_base36
+from src.db.main import async_engine, async_session
+from src.db.models import Book, Review, User
+from src.db.redis import redis_client
+from src.books.services import BookService
+
+
+PASSWORD = "Example@123"
+API = "/api/v1"
+
+
+def percentile(latencies: list[float], rank: float) -> float:
+    index = max(round(rank / 100 * len(latencies)) - 1, 0)
+    return round(latencies[index] * 1000, 3)
+
+
+async def seed(run_id: str, users: int, books: int, reviews: int, rng: random.Random) -> dict:
+    password = await generate_passwd_hash(PASSWORD)
+    user_ids = generate_ids(users)
+    book_ids = generate_ids(books)
+
+    user_rows = [
+        {"id": user_id, "name": f"Load User {i}", "email": f"load.{run_id}.{i}@bench.local",
+         "username": f"load.{to_base36(user_id)}", "password": password, "setup": True}
+        for i, user_id in enumerate(user_ids)
+    ]
+
+    stats = {book_id: [0] * 5 for book_id in book_ids}
+    review_rows = []
+    for review_id in generate_ids(reviews):
+        book_id, rating = rng.choice(book_ids), rng.randint(1, 5)
+        stats[book_id][rating - 1] += 1
+        review_rows.append({"id": review_id, "rating": rating, "review": "Seeded review", "user_id": rng.choice(user_ids), "book_id": book_id})
+
+    book_rows = []
+    for i, book_id in enumerate(book_ids):
+        histogram = stats[book_id]
+        count = sum(histogram)
+        book_rows.append({
+            "id": book_id, "title": f"Load Book {i}", "author": f"Author {i % 100}", "published": date(2000, 1, 1) + timedelta(days=i % 9000),
+            "user_id": rng.choice(user_ids), "review_count": count,
+            "rating_avg": sum(rating * n for rating, n in enumerate(histogram, 1)) / count if count else 0,
+            **{f"rating_{rating}": n for rating, n in enumerate(histogram, 1)},
+        })
+
+    async with async_session() as session:
+        for model, rows in ((User, user_rows), (Book, book_rows), (Review, review_rows)):
+            for i in range(0, len(rows), 1000):
+                await session.exec(insert(model), params=rows[i:i + 1000])
+        await session.commit()
+
+    return {"users": [(row["id"], row["email"]) for row in user_rows], "books": book_ids}
+
+
+async def cleanup(data: dict):
+    user_ids = [user_id for user_id, _ in data["users"]]
+
+    async with async_session() as session:
+        await session.exec(delete(Review).where(or_(Review.user_id.in_(user_ids), Review.book_id.in_(data["books"]))))
+        await session.exec(delete(Book).where(Book.id.in_(data["books"])))
+        await session.exec(delete(User).where(User.id.in_(user_ids)))
+        await session.commit()
+
+    await redis_client.delete(*(f"{prefix}:{user_id}" for user_id in user_ids for prefix in ("user", "refresh")))
+    await BookService.invalidate_cache(*data["books"])
+
+
+class VirtualUser:
+    def __init__(self, client: httpx.AsyncClient, email: str, books: list[int], rng: random.Random):
+        self.client = client
+        self.email = email
+        self.books = books
+        self.rng = rng
+        self.access = self.refresh = None
+
+    def auth(self, token: str) -> dict:
+        return {"Authorization": f"Bearer {token}"}
+
+    async def sign_in(self):
+        response = await self.client.post(f"{API}/auth/sign-in", json={"email": self.email, "password": PASSWORD})
+        if response.is_success:
+            tokens = response.json()["data"]["token"]
+            self.access, self.refresh = tokens["access"], tokens["refresh"]
+        return response
+
+    async def list_books(self):
+        return await self.client.get(f"{API}/books/", params={"limit": 20}, headers=self.auth(self.access))
+
+    async def book_detail(self):
+        return await self.client.get(f"{API}/books/{self.rng.choice(self.books)}", headers=self.auth(self.access))
+
+    async def create_review(self):
+        review = {"rating": self.rng.randint(1, 5), "review": "Load test review"}
+        return await self.client.post(f"{API}/reviews/book/{self.rng.choice(self.books)}", json=review, headers=self.auth(self.access))
+
+    async def refresh_token(self):
+        response = await self.client.get(f"{API}/auth/refresh-token", headers=self.auth(self.refresh))
+        if response.is_success:
+            tokens = response.json()["data"]["token"]
+            self.access, self.refresh = tokens["access"], tokens["refresh"]
+        return response
+
+
+SCENARIOS = ["sign_in", "list_books", "book_detail", "create_review", "refresh_token"]
+
+
+async def run_scenario(name: str, virtual_users: list[VirtualUser], requests: int) -> dict:
+    latencies, errors = [], 0
+    remaining = requests
+
+    async def worker(virtual_user: VirtualUser):
+        nonlocal remaining, errors
+        action = getattr(virtual_user, name)
+
+        while remaining > 0:
+            remaining -= 1
+            start_time = time.perf_counter()
+            try:
+                response = await action()
+                failed = not response.is_success
+            except httpx.HTTPError:
+                failed = True
+            latencies.append(time.perf_counter() - start_time)
+            errors += failed
+
+    start_time = time.perf_counter()
+    await asyncio.gather(*(worker(virtual_user) for virtual_user in virtual_users))
+    elapsed = time.perf_counter() - start_time
+
+    latencies.sort()
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "rps": round(len(latencies) / elapsed, 2),
+        "p50_ms": percentile(latencies, 50),
+        "p95_ms": percentile(latencies, 95),
+        "p99_ms": percentile(latencies, 99),
+        "max_ms": round(latencies[-1] * 1000, 3),
+    }
+
+
+@asynccontextmanager
+async def make_client(url: str | None, concurrency: int):
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+
+    if url:
+        async with httpx.AsyncClient(base_url=url, limits=limits, timeout=30) as client:
+            yield client
+        return
+
+    from src.app import app
+
+    async with app.router.lifespan_context(app):
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://localhost", timeout=30) as client:
+            yield client
+
+
+def compare(results: dict, baseline: dict, tolerance: float) -> list[str]:
+    regressions = []
+    for name, result in results.items():
+        if (before := baseline.get(name)) is None:
+            continue
+        if result["rps"] < before["rps"] * (1 - tolerance):
+            regressions.append(f"{name}: rps {before['rps']} -> {result['rps']}")
+        if result["p95_ms"] > before["p95_ms"] * (1 + tolerance):
+            regressions.append(f"{name}: p95 {before['p95_ms']}ms -> {result['p95_ms']}ms")
+    return regressions
+
+
+async def main(args: argparse.Namespace) -> int:
+    if args.concurrency > args.users:
+        sys.exit("--users must be at least --concurrency, every virtual user owns an account")
+
+    rng = random.Random(args.seed)
+    run_id = uuid.uuid4().hex[:8]
+    data = await seed(run_id, args.users, args.books, args.reviews, rng)
+
+    try:
+        async with make_client(args.url, args.concurrency) as client:
+            virtual_users = [
+                VirtualUser(client, email, data["books"], random.Random(args.seed + i))
+                for i, (_, email) in enumerate(data["users"][:args.concurrency])
+            ]
+            await asyncio.gather(*(virtual_user.sign_in() for virtual_user in virtual_users))
+
+            scenarios = args.scenarios or SCENARIOS
+            results = {name: await run_scenario(name, virtual_users, args.requests) for name in scenarios}
+    finally:
+        if not args.keep:
+            await cleanup(data)
+        await async_engine.dispose()
+
+    report = {
+        "config": {key: getattr(args, key) for key in ("users", "books", "reviews", "concurrency", "requests", "seed")},
+        "mode": "http" if args.url else "in-process",
+        "results": results,
+    }
+    print(json.dumps(report, indent=2))
+
+    if args.output:
+        with open(args.output, "w") as file:
+            json.dump(report, file, indent=2)
+
+    if args.baseline:
+        with open(args.baseline) as file:
+            regressions = compare(results, json.load(file)["results"], args.tolerance)
+        for regression in regressions:
+            print(f"regression: {regression}", file=sys.stderr)
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--users", type=int, default=100)
+    parser.add_argument("--books", type=int, default=2000)
+    parser.add_argument("--reviews", type=int, default=10000)
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--requests", type=int, default=2000, help="requests per scenario")
+    parser.add_argument("--scenarios", nargs="+", choices=SCENARIOS)
+    parser.add_argument("--url", help="base URL of a running server, in process when omitted")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", help="write the JSON report to this file")
+    parser.add_argument("--baseline", help="earlier report to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.1)
+    parser.add_argument("--keep", action="store_true", help="keep the seeded rows")
+    sys.exit(asyncio.run(main(parser.parse_args())))
@@ -1,5 +1,5 @@
-import uvicorn
+from src.server import run
 
 
 if __name__ == "__main__":
-    uvicorn.run("src.app:app", host="localhost", port=4000, reload=True)
+    run()
@@ -0,0 +1,31 @@
+"""books keyset indexes
+
+Revision ID: 7b3e5d1a9c42
+Revises: ceb25a5f8d76
+Create Date: 2025-09-10 10:12:44.381207
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel
+
+
+# revision identifiers, used by Alembic.
+revision: str = '7b3e5d1a9c42'
+down_revision: Union[str, None] = 'ceb25a5f8d76'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index('ix_books_created_at_id', 'books', [sa.text('created_at DESC'), sa.text('id DESC')], unique=False)
+    op.create_index('ix_books_user_id_created_at_id', 'books', ['user_id', sa.text('created_at DESC'), sa.text('id DESC')], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_books_user_id_created_at_id', table_name='books')
+    op.drop_index('ix_books_created_at_id', table_name='books')
@@ -0,0 +1,69 @@
+"""book rating aggregates
+
+Revision ID: c41f8a2d6e17
+Revises: 7b3e5d1a9c42
+Create Date: 2025-09-12 11:27:03.512944
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c41f8a2d6e17'
+down_revision: Union[str, None] = '7b3e5d1a9c42'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+RATING_COLUMNS = ['review_count', 'rating_1', 'rating_2', 'rating_3', 'rating_4', 'rating_5']
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    for column in RATING_COLUMNS:
+        op.add_column('books', sa.Column(column, sa.BIGINT(), server_default='0', nullable=False))
+    op.add_column('books', sa.Column('rating_avg', sa.FLOAT(), server_default='0', nullable=False))
+
+    # Backfill from existing reviews, buckets match BookService.rating_bucket
+    op.execute("""
+        UPDATE books SET
+            review_count = stats.review_count,
+            rating_avg = stats.rating_avg,
+            rating_1 = stats.rating_1,
+            rating_2 = stats.rating_2,
+            rating_3 = stats.rating_3,
+            rating_4 = stats.rating_4,
+            rating_5 = stats.rating_5
+        FROM (
+            SELECT
+                book_id,
+                COUNT(*) AS review_count,
+                AVG(rating) AS rating_avg,
+                COUNT(*) FILTER (WHERE bucket = 1) AS rating_1,
+                COUNT(*) FILTER (WHERE bucket = 2) AS rating_2,
+                COUNT(*) FILTER (WHERE bucket = 3) AS rating_3,
+                COUNT(*) FILTER (WHERE bucket = 4) AS rating_4,
+                COUNT(*) FILTER (WHERE bucket = 5) AS rating_5
+            FROM (
+                SELECT book_id, rating, LEAST(GREATEST(FLOOR(rating + 0.5), 1), 5) AS bucket
+                FROM reviews
+                WHERE book_id IS NOT NULL
+            ) AS bucketed
+            GROUP BY book_id
+        ) AS stats
+        WHERE books.id = stats.book_id
+    """)
+
+    op.create_index('ix_books_rating_avg_id', 'books', [sa.text('rating_avg DESC'), sa.text('id DESC')], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_books_rating_avg_id', table_name='books')
+    op.drop_column('books', 'rating_avg')
+    for column in reversed(RATING_COLUMNS):
+        op.drop_column('books', column)
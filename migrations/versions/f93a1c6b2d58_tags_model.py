@@ -0,0 +1,72 @@
+"""tags model
+
+Revision ID: f93a1c6b2d58
+Revises: e2d7b4f9a631
+Create Date: 2025-09-17 10:12:46.830517
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f93a1c6b2d58'
+down_revision: Union[str, None] = 'e2d7b4f9a631'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('tags',
+    sa.Column('id', sa.BIGINT(), nullable=False),
+    sa.Column('name', sa.VARCHAR(length=50), nullable=False),
+    sa.Column('book_count', sa.BIGINT(), server_default='0', nullable=False),
+    sa.Column('created_at', postgresql.TIMESTAMP(timezone=True), nullable=False),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('name')
+    )
+    op.create_index(op.f('ix_tags_id'), 'tags', ['id'], unique=False)
+    op.create_index('ix_tags_book_count_id', 'tags', [sa.text('book_count DESC'), sa.text('id DESC')], unique=False)
+    op.create_table('book_tags',
+    sa.Column('book_id', sa.BIGINT(), nullable=False),
+    sa.Column('tag_id', sa.BIGINT(), nullable=False),
+    sa.Column('created_at', postgresql.TIMESTAMP(timezone=True), nullable=False),
+    sa.ForeignKeyConstraint(['book_id'], ['books.id'], ondelete='CASCADE'),
+    sa.ForeignKeyConstraint(['tag_id'], ['tags.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('book_id', 'tag_id')
+    )
+    op.create_index('ix_book_tags_tag_id_book_id', 'book_tags', ['tag_id', 'book_id'], unique=False)
+
+    # Same trigger as BOOK_TAG_COUNT_TRIGGER in src/db/models.py
+    op.execute("""
+        CREATE OR REPLACE FUNCTION book_tags_count() RETURNS trigger AS $$
+        BEGIN
+            IF TG_OP = 'INSERT' THEN
+                UPDATE tags SET book_count = book_count + 1 WHERE id = NEW.tag_id;
+            ELSE
+                UPDATE tags SET book_count = book_count - 1 WHERE id = OLD.tag_id;
+            END IF;
+            RETURN NULL;
+        END;
+        $$ LANGUAGE plpgsql
+    """)
+    op.execute("""
+        CREATE TRIGGER book_tags_count AFTER INSERT OR DELETE ON book_tags
+        FOR EACH ROW EXECUTE FUNCTION book_tags_count()
+    """)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.execute('DROP TRIGGER IF EXISTS book_tags_count ON book_tags')
+    op.execute('DROP FUNCTION IF EXISTS book_tags_count()')
+    op.drop_index('ix_book_tags_tag_id_book_id', table_name='book_tags')
+    op.drop_table('book_tags')
+    op.drop_index('ix_tags_book_count_id', table_name='tags')
+    op.drop_index(op.f('ix_tags_id'), table_name='tags')
+    op.drop_table('tags')
@@ -1,25 +1,77 @@
-from fastapi import FastAPI
+import time
+
+# Cold start is measured from here, before the framework and routers are imported
+import_started = time.perf_counter()
+
+from fastapi import FastAPI, Response
 from typing import Optional
 from contextlib import asynccontextmanager
+import asyncio
+import logging
 
 from src.lib.errors import register_all_errors
 from src.lib.middlewares import register_middlewares
+from src.lib.metrics import render_metrics, startup_seconds
+from src.lib.logger import setup_logging
+from src.lib.health import refresh_probes, run_health_probes, get_readiness
+from src.lib.response import FastJSONResponse
 
 from src.auth.routes import auth_router
 from src.books.routes import book_router
 from src.reviews.routes import review_router
 from src.tags.routes import tag_router
 
-from src.db.main import init_db, async_engine
+from src.db.main import init_db, check_db_head, warm_db_pool, dispose_engines
+from src.db.redis import redis_client, redis_listen_invalidations, warm_redis_pool
+from src.lib.snowflake import acquire_shard_lease, hold_shard_lease, release_shard_lease
+from src.config import Config
+
+
+log_listener = setup_logging()
+logger = logging.getLogger("bookly")
 
 
 @asynccontextmanager
 async def life_span(app: FastAPI):
-    print("Server is running...!")
-    await init_db()
+    log_listener.start()
+    startup_started = time.perf_counter()
+
+    # Alembic owns the schema, production workers only check it is up to date
+    if Config.DB_STARTUP == "check":
+        revision = await check_db_head()
+        logger.info("Database is at revision %s!", revision)
+    else:
+        await init_db()
+
+    await asyncio.gather(warm_db_pool(), warm_redis_pool())
+    # Build the OpenAPI schema now rather than on the first docs request
+    app.openapi()
+    invalidation_listener = asyncio.create_task(redis_listen_invalidations())
+    await refresh_probes()
+    health_probes = asyncio.create_task(run_health_probes())
+
+    # One shard id per process, so every worker and replica issues distinct ids
+    if Config.SNOWFLAKE_SHARD_LEASE:
+        shard_id = await acquire_shard_lease(redis_client)
+        shard_lease = asyncio.create_task(hold_shard_lease(redis_client))
+        logger.info("Snowflake shard %s leased!", shard_id)
+
+    startup = time.perf_counter() - startup_started
+    startup_seconds.labels("import").set(import_seconds)
+    startup_seconds.labels("startup").set(startup)
+    logger.info("Server is running...!", extra={"import_seconds": round(import_seconds, 3), "startup_seconds": round(startup, 3)})
     yield
-    print("Server has been stopped...!")
-    await async_engine.dispose()
+    logger.info("Server has been stopped...!")
+    invalidation_listener.cancel()
+    health_probes.cancel()
+
+    try:
+        if Config.SNOWFLAKE_SHARD_LEASE:
+            shard_lease.cancel()
+            await release_shard_lease(redis_client)
+    finally:
+        await dispose_engines()
+        log_listener.stop()
 
 
 version = "v1"
@@ -49,7 +101,7 @@ app = FastAPI(
     docs_url=f"{version_prefix}/docs",
     redoc_url=f"{version_prefix}/redoc",
     lifespan=life_span,
-    debug=True
+    debug=Config.ENVIRONMENT == "development"
 )
 
 
@@ -67,3 +119,24 @@ app.include_router(tag_router, prefix=f"{version_prefix}/tags", tags=["tags"])
 @app.get("/hello")
 def say_hello(name: Optional[str] = "User") -> dict:
     return {"message": f"Hello, {name}!"}
+
+
+@app.get("/healthz", include_in_schema=False)
+async def healthz() -> dict:
+    return {"status": "ok"}
+
+
+@app.get("/readyz", include_in_schema=False)
+async def readyz() -> FastJSONResponse:
+    """Serve the cached probe results, 503 while a dependency is down or its pool is saturated."""
+    ready, checks = get_readiness()
+    return FastJSONResponse(status_code=200 if ready else 503, content={"status": "ready" if ready else "unavailable", "checks": checks})
+
+
+@app.get("/metrics", include_in_schema=False)
+def metrics() -> Response:
+    content, media_type = render_metrics()
+    return Response(content=content, media_type=media_type)
+
+
+import_seconds = time.perf_counter() - import_started
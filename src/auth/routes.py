@@ -3,13 +3,13 @@ from sqlmodel.ext.asyncio.session import AsyncSession
 from datetime import datetime, timezone
 
 from src.lib.response import SuccessResponse, ErrorResponse
-from src.lib.utils import verify_password, encode_jwt_token, get_timestamp, generate_passwd_hash
-from src.lib.dependencies import get_current_user, refresh_token_bearer, access_token_bearer
-from src.db.redis import redis_client, redis_set_json, redis_set_string
+from src.lib.utils import verify_password, encode_jwt_token, get_timestamp
+from src.lib.dependencies import get_current_user, refresh_token_bearer, access_token_bearer, import_token_guard
+from src.db.redis import redis_set_many, redis_delete_many
 from src.db.main import get_session
 from src.config import Config
 
-from .schemas import UserSignupModel, UserSigninModel, UserModel, UserUpdateModel, ChangePasswordModel, UserBooksReviewsModel
+from .schemas import UserSignupModel, UserSignupBatchModel, UserSigninModel, UserModel, UserUpdateModel, ChangePasswordModel, UserBooksReviewsModel
 from .services import UserService
 
 
@@ -18,7 +18,7 @@ user_service = UserService()
 
 
 @auth_router.post("/sign-up", status_code=status.HTTP_201_CREATED)
-async def signup_user(user_data: UserSignupModel, session: AsyncSession = Depends(get_session)):
+async def signup_user(user_data: UserSignupModel, session: AsyncSession = Depends(get_session("write"))):
     user_exists = await user_service.user_email_exists(user_data.email, session)
     
     if user_exists:
@@ -28,8 +28,17 @@ async def signup_user(user_data: UserSignupModel, session: AsyncSession = Depend
     return SuccessResponse(status=status.HTTP_201_CREATED, message="Signup successfully!")
 
 
+@auth_router.post("/sign-up/batch", status_code=status.HTTP_201_CREATED)
+async def signup_users(users_data: UserSignupBatchModel, _: None = Depends(import_token_guard), session: AsyncSession = Depends(get_session("write"))):
+    if len(users_data.users) > Config.SIGNUP_BATCH_MAX:
+        raise ErrorResponse(status=status.HTTP_400_BAD_REQUEST, message=f"At most {Config.SIGNUP_BATCH_MAX} users per batch!")
+
+    results = await user_service.create_users(users_data.users, session)
+    return SuccessResponse(status=status.HTTP_201_CREATED, message="Signup batch processed!", data=results)
+
+
 @auth_router.post("/sign-in")
-async def signin_user(login_data: UserSigninModel, session: AsyncSession = Depends(get_session)):
+async def signin_user(login_data: UserSigninModel, session: AsyncSession = Depends(get_session("write"))):
     user_exists = (
         await user_service.get_user_by_email(login_data.email, session)
         if login_data.email
@@ -39,19 +48,22 @@ async def signin_user(login_data: UserSigninModel, session: AsyncSession = Depen
     if not user_exists:
         raise ErrorResponse(status=status.HTTP_404_NOT_FOUND, message="User not found!")
 
-    password_valid = verify_password(login_data.password, user_exists.password)
+    password_valid = await verify_password(login_data.password, user_exists.password)
 
     if not password_valid:
         raise ErrorResponse(status=status.HTTP_401_UNAUTHORIZED, message="Invalid credentials!")
 
     user_data = UserModel.model_validate(user_exists, from_attributes=True).model_dump(mode="json")
-    user_data_result = await redis_set_json(f"user:{user_exists.id}", user_data)
 
     access_token = encode_jwt_token(user_id=user_exists.id, token_type="access")
     refresh_token = encode_jwt_token(user_id=user_exists.id, token_type="refresh")
-    refresh_token_result = await redis_set_string(f"refresh:{user_exists.id}", refresh_token, Config.REFRESH_EXPIRY)
 
-    if not user_data_result or not refresh_token_result:
+    cache_result = await redis_set_many(
+        (f"user:{user_exists.id}", user_data, Config.ACCESS_EXPIRY),
+        (f"refresh:{user_exists.id}", refresh_token, Config.REFRESH_EXPIRY),
+    )
+
+    if not cache_result:
         raise ErrorResponse(status=status.HTTP_500_INTERNAL_SERVER_ERROR, message="Unable to signin!")
 
     res_data = {"user": user_data, "token": {"access": access_token, "refresh": refresh_token}}
@@ -64,33 +76,36 @@ async def signin_user(login_data: UserSigninModel, session: AsyncSession = Depen
 
 
 @auth_router.get("/user-info")
-async def get_user_info(user_data=Depends(get_current_user)):
+async def get_user_info(user_data=Depends(get_current_user("read"))):
     if user_data is not None:
         return SuccessResponse(status=status.HTTP_200_OK, message="User information!", data=user_data)
     raise ErrorResponse(status=status.HTTP_500_INTERNAL_SERVER_ERROR, message="Something went wrong!")
 
 
 @auth_router.get("/all-info")
-async def get_books_and_reviews(token_data: dict = Depends(access_token_bearer), session: AsyncSession = Depends(get_session)):
+async def get_books_and_reviews(token_data: dict = Depends(access_token_bearer), session: AsyncSession = Depends(get_session("read"))):
     user_data = await user_service.get_user_books_reviews(token_data["uid"], session)
-    data = UserBooksReviewsModel.model_validate(user_data, from_attributes=True).model_dump(mode="json")
+    data = UserBooksReviewsModel.model_validate(user_data, from_attributes=True)
     return SuccessResponse(status=status.HTTP_200_OK, message="User information fetched!", data=data)
 
 
 @auth_router.get("/refresh-token")
-async def get_new_tokens(token_data: dict = Depends(refresh_token_bearer), session: AsyncSession = Depends(get_session)):
+async def get_new_tokens(token_data: dict = Depends(refresh_token_bearer), session: AsyncSession = Depends(get_session("write"))):
     if datetime.fromtimestamp(token_data["exp"], timezone.utc) > get_timestamp():
         current_user_id = token_data["uid"]
 
         query_data = await user_service.get_user_by_id(current_user_id, session)
         user_data = UserModel.model_validate(query_data, from_attributes=True).model_dump(mode="json")
-        user_data_result = await redis_set_json(f"user:{current_user_id}", user_data)
 
         access_token = encode_jwt_token(user_id=current_user_id, token_type="access")
         refresh_token = encode_jwt_token(user_id=current_user_id, token_type="refresh")
-        refresh_token_result = await redis_set_string(f"refresh:{current_user_id}", refresh_token, Config.REFRESH_EXPIRY)
 
-        if not user_data_result or not refresh_token_result:
+        cache_result = await redis_set_many(
+            (f"user:{current_user_id}", user_data, Config.ACCESS_EXPIRY),
+            (f"refresh:{current_user_id}", refresh_token, Config.REFRESH_EXPIRY),
+        )
+
+        if not cache_result:
             raise ErrorResponse(status=status.HTTP_500_INTERNAL_SERVER_ERROR, message="Unable to refresh!")
 
         res_data = {"user": user_data, "token": {"access": access_token, "refresh": refresh_token}}
@@ -103,19 +118,18 @@ async def get_new_tokens(token_data: dict = Depends(refresh_token_bearer), sessi
 async def signout_user(token_data: dict = Depends(access_token_bearer)):
     current_user_id = token_data["uid"]
 
-    await redis_client.delete(f"user:{current_user_id}")
-    await redis_client.delete(f"refresh:{current_user_id}")
+    await redis_delete_many(f"user:{current_user_id}", f"refresh:{current_user_id}", invalidate=True)
 
     return SuccessResponse(status=status.HTTP_200_OK, message="Signout successfully")
 
 
 @auth_router.patch("/update-profile")
-async def update_user_profile(update_data: UserUpdateModel, token_data=Depends(access_token_bearer), session: AsyncSession = Depends(get_session)):
+async def update_user_profile(update_data: UserUpdateModel, token_data=Depends(access_token_bearer), session: AsyncSession = Depends(get_session("write"))):
     user_id = token_data["uid"]
 
     updated_user = await user_service.update_user(user_id, update_data, session)
     updated_data = UserModel.model_validate(updated_user, from_attributes=True).model_dump(mode="json")
-    user_data_result = await redis_set_json(f"user:{user_id}", updated_data)
+    user_data_result = await redis_set_many((f"user:{user_id}", updated_data, Config.ACCESS_EXPIRY), invalidate=True)
 
     if not user_data_result:
         raise ErrorResponse(status=status.HTTP_500_INTERNAL_SERVER_ERROR, message="Unable to update!")
@@ -124,7 +138,7 @@ async def update_user_profile(update_data: UserUpdateModel, token_data=Depends(a
 
 
 @auth_router.patch("/change-password")
-async def change_user_password(passwords: ChangePasswordModel, token_data=Depends(access_token_bearer), session: AsyncSession = Depends(get_session)):
+async def change_user_password(passwords: ChangePasswordModel, token_data=Depends(access_token_bearer), session: AsyncSession = Depends(get_session("write"))):
     if passwords.old_password == passwords.new_password:
         raise ErrorResponse(status=status.HTTP_400_BAD_REQUEST, message="Please, choose a different password!")
     
@@ -133,16 +147,16 @@ async def change_user_password(passwords: ChangePasswordModel, token_data=Depend
     if not query_data:
         raise ErrorResponse(status=status.HTTP_401_UNAUTHORIZED, message="Invalid authorization!")
 
-    if not verify_password(passwords.old_password, query_data.password):
+    if not await verify_password(passwords.old_password, query_data.password):
         raise ErrorResponse(status=status.HTTP_401_UNAUTHORIZED, message="Incorrect old password!")
 
-    query_data.password = generate_passwd_hash(passwords.new_password)
+    updated_user = await user_service.update_password(query_data.id, query_data.password, passwords.new_password, session)
 
-    await session.commit()
-    await session.refresh(query_data)
+    if not updated_user:
+        raise ErrorResponse(status=status.HTTP_409_CONFLICT, message="Password was changed meanwhile, please retry!")
 
-    user_data = UserModel.model_validate(query_data, from_attributes=True).model_dump(mode="json")
-    user_data_result = await redis_set_json(f"user:{token_data["uid"]}", user_data)
+    user_data = UserModel.model_validate(updated_user, from_attributes=True).model_dump(mode="json")
+    user_data_result = await redis_set_many((f"user:{token_data["uid"]}", user_data, Config.ACCESS_EXPIRY), invalidate=True)
 
     if not user_data_result:
         raise ErrorResponse(status=status.HTTP_500_INTERNAL_SERVER_ERROR, message="Unable to proceed!")
@@ -23,6 +23,10 @@ class UserSignupModel(BaseModel):
     }
 
 
+class UserSignupBatchModel(BaseModel):
+    users: List[UserSignupModel] = Field(min_length=1)
+
+
 class UserSigninModel(BaseModel):
     email: str | None = None
     username: str | None = None
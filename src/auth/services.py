@@ -1,11 +1,16 @@
 from sqlmodel.ext.asyncio.session import AsyncSession
 from sqlalchemy.orm import selectinload
-from sqlmodel import select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.exc import IntegrityError
+from sqlmodel import select, update
 from fastapi import status
+from typing import List
+import asyncio
 
 from src.lib.response import ErrorResponse
-from src.lib.utils import generate_passwd_hash, has_empty_field
-from src.db.models import User
+from src.lib.utils import generate_ids, generate_passwd_hash, has_empty_field
+from src.db.models import User, default_username
+from src.config import Config
 from .schemas import UserSignupModel, UserUpdateModel
 
 
@@ -42,34 +47,80 @@ class UserService:
     async def create_user(user_data: UserSignupModel, session: AsyncSession):
         user_data_dict = user_data.model_dump()
         new_user = User(**user_data_dict)
-        new_user.password = generate_passwd_hash(user_data_dict["password"])
+        new_user.password = await generate_passwd_hash(user_data_dict["password"])
         session.add(new_user)
         await session.commit()
         return new_user
 
     @staticmethod
-    async def update_user(user_id: int, update_data: UserUpdateModel, session: AsyncSession):
-        statement = select(User).where(User.id == user_id)
+    async def create_users(users_data: List[UserSignupModel], session: AsyncSession):
+        """Create users in one transaction, returns a result for each item in input order.
+
+        Known emails are skipped before hashing, and INSERT ... ON CONFLICT (email) DO NOTHING
+        reports emails taken by concurrent signups in the meantime as conflicts too.
+        """
+        statement = select(User.email).where(User.email.in_([user_data.email for user_data in users_data]))
         result = await session.exec(statement)
-        user = result.first()
+        taken_emails = set(result.all())
 
-        if not user:
-            raise ErrorResponse(status=status.HTTP_404_NOT_FOUND, message="User not found!")
-        
-        if update_data.username != user.username:
-            user_exists = await UserService.user_username_exists(update_data.username, session)
+        new_users = []
+        for user_data in users_data:
+            if user_data.email not in taken_emails:
+                taken_emails.add(user_data.email)
+                new_users.append(user_data)
 
-            if user_exists:
-                raise ErrorResponse(status=status.HTTP_409_CONFLICT, message="Username already exists!")
-        
+        # Chunks of the executor's size, so sign-ins queue behind at most one chunk of an import
+        hashes = []
+        for i in range(0, len(new_users), Config.BCRYPT_WORKERS):
+            hashes += await asyncio.gather(*(generate_passwd_hash(user_data.password) for user_data in new_users[i:i + Config.BCRYPT_WORKERS]))
+
+        created_emails = set()
+        if new_users:
+            rows = [
+                {**user_data.model_dump(), "id": user_id, "password": hashed, "username": default_username(user_data.email, user_id)}
+                for user_data, hashed, user_id in zip(new_users, hashes, generate_ids(len(new_users)))
+            ]
+            statement = pg_insert(User).values(rows).on_conflict_do_nothing(index_elements=[User.email]).returning(User.email)
+            result = await session.exec(statement)
+            created_emails = set(result.scalars().all())
+            await session.commit()
+
+        results = []
+        for user_data in users_data:
+            if user_data.email in created_emails:
+                created_emails.discard(user_data.email)
+                results.append({"email": user_data.email, "created": True})
+            else:
+                results.append({"email": user_data.email, "created": False, "error": "Email already exists!"})
+        return results
+
+    @staticmethod
+    async def update_user(user_id: int, update_data: UserUpdateModel, session: AsyncSession):
         user_data = update_data.model_dump_filtered()
         user_data["setup"] = not has_empty_field(user_data)
 
-        for k, v in user_data.items():
-            setattr(user, k, v)
+        statement = update(User).where(User.id == user_id).values(**user_data).returning(User)
+
+        try:
+            result = await session.exec(statement, execution_options={"synchronize_session": False, "populate_existing": True})
+            user = result.scalars().first()
+            await session.commit()
+        except IntegrityError:
+            await session.rollback()
+            raise ErrorResponse(status=status.HTTP_409_CONFLICT, message="Username already exists!")
 
+        if not user:
+            raise ErrorResponse(status=status.HTTP_404_NOT_FOUND, message="User not found!")
+        return user
+
+    @staticmethod
+    async def update_password(user_id: int, old_hash: str, new_password: str, session: AsyncSession):
+        """Swap the password hash only if it is still the one that was verified."""
+        new_hash = await generate_passwd_hash(new_password)
+        statement = update(User).where(User.id == user_id, User.password == old_hash).values(password=new_hash).returning(User)
+        result = await session.exec(statement, execution_options={"synchronize_session": False, "populate_existing": True})
+        user = result.scalars().first()
         await session.commit()
-        await session.refresh(user)
         return user
 
     @staticmethod
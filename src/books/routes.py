@@ -1,13 +1,16 @@
-from fastapi import APIRouter, Depends, status
+from fastapi import APIRouter, Depends, Query, status
+from fastapi.responses import StreamingResponse
 from sqlmodel.ext.asyncio.session import AsyncSession
-from pydantic import TypeAdapter
-from typing import List
+from pydantic import BaseModel, TypeAdapter, ValidationError
+from typing import Any, Dict, List, Literal
 
-from src.books.schemas import BookModel, BookCreateModel, BookUpdateModel
+from src.books.schemas import BookModel, BookCreateModel, BookUpdateModel, BookBatchUpdateModel, BookBatchDeleteModel
 from src.books.services import BookService
-from src.db.main import get_session
-from src.lib.response import SuccessResponse, ErrorResponse
-from src.lib.dependencies import access_token_bearer
+from src.db.main import get_session, async_session
+from src.lib.response import SuccessResponse, CachedSuccessResponse, ErrorResponse
+from src.lib.dependencies import access_token_bearer, get_page_params
+from src.lib.utils import encode_cursor
+from src.config import Config
 
 
 book_router = APIRouter()
@@ -16,51 +19,157 @@ book_adapter = TypeAdapter(List[BookModel])
 
 
 @book_router.post("/")
-async def create_a_book(book_data: BookCreateModel, token_data: dict = Depends(access_token_bearer), session: AsyncSession = Depends(get_session)):
+async def create_a_book(book_data: BookCreateModel, token_data: dict = Depends(access_token_bearer), session: AsyncSession = Depends(get_session("write"))):
     current_book = await book_service.create_book(book_data, token_data["uid"], session)
-    book_data = BookModel.model_validate(current_book, from_attributes=True).model_dump(mode="json")
+    book_data = BookModel.model_validate(current_book, from_attributes=True)
     return SuccessResponse(status=status.HTTP_201_CREATED, message="Book created successfully!", data=book_data)
 
 
+def validate_batch(model: type[BaseModel], items: List[Dict[str, Any]]):
+    if len(items) > Config.BOOK_BATCH_MAX:
+        raise ErrorResponse(status=status.HTTP_400_BAD_REQUEST, message=f"At most {Config.BOOK_BATCH_MAX} books per batch!")
+
+    valid_items, errors = [], []
+
+    for index, item in enumerate(items):
+        try:
+            valid_items.append((index, model.model_validate(item)))
+        except ValidationError as e:
+            errors.append({"index": index, "error": e.errors(include_url=False, include_context=False)})
+    return valid_items, errors
+
+
+@book_router.post("/batch")
+async def create_books(items: List[Dict[str, Any]], token_data: dict = Depends(access_token_bearer), session: AsyncSession = Depends(get_session("write"))):
+    valid_items, errors = validate_batch(BookCreateModel, items)
+    new_books = await book_service.create_books([book_data for _, book_data in valid_items], token_data["uid"], session) if valid_items else []
+
+    books_data = book_adapter.validate_python(new_books, from_attributes=True)
+    res_status = status.HTTP_207_MULTI_STATUS if errors else status.HTTP_201_CREATED
+    return SuccessResponse(status=res_status, message="Books created successfully!", data={"created": books_data, "errors": errors})
+
+
+@book_router.patch("/batch")
+async def update_books(items: List[Dict[str, Any]], token_data: dict = Depends(access_token_bearer), session: AsyncSession = Depends(get_session("write"))):
+    valid_items, errors = validate_batch(BookBatchUpdateModel, items)
+    updates = [(book_data.id, book_data) for _, book_data in valid_items]
+    updated_ids = await book_service.update_books(updates, token_data["uid"], session) if updates else set()
+
+    for index, book_data in valid_items:
+        if book_data.id not in updated_ids:
+            errors.append({"index": index, "error": "Book not found or You can't update!"})
+
+    res_status = status.HTTP_207_MULTI_STATUS if errors else status.HTTP_200_OK
+    data = {"updated": [str(book_id) for book_id in updated_ids], "errors": errors}
+    return SuccessResponse(status=res_status, message="Books updated successfully!", data=data)
+
+
+@book_router.post("/batch/delete")
+async def delete_books(delete_data: BookBatchDeleteModel, token_data: dict = Depends(access_token_bearer), session: AsyncSession = Depends(get_session("write"))):
+    if len(delete_data.ids) > Config.BOOK_BATCH_MAX:
+        raise ErrorResponse(status=status.HTTP_400_BAD_REQUEST, message=f"At most {Config.BOOK_BATCH_MAX} books per batch!")
+
+    deleted_ids = await book_service.delete_books(delete_data.ids, token_data["uid"], session)
+    errors = [
+        {"index": index, "error": "Book not found or You can't delete!"}
+        for index, book_id in enumerate(delete_data.ids)
+        if book_id not in deleted_ids
+    ]
+
+    res_status = status.HTTP_207_MULTI_STATUS if errors else status.HTTP_200_OK
+    data = {"deleted": [str(book_id) for book_id in deleted_ids], "errors": errors}
+    return SuccessResponse(status=res_status, message="Books deleted successfully!", data=data)
+
+
 @book_router.get("/")
-async def get_all_books(session: AsyncSession = Depends(get_session), _: dict = Depends(access_token_bearer)):
-    all_books = await book_service.get_all_books(session)
+async def get_all_books(
+    sort: Literal["recent", "rating"] = "recent",
+    page: tuple = Depends(get_page_params),
+    session: AsyncSession = Depends(get_session("read")),
+    _: dict = Depends(access_token_bearer),
+):
+    all_books, next_key = await book_service.get_all_books(*page, session, sort)
     books_data = book_adapter.validate_python(all_books, from_attributes=True)
-    books_data = book_adapter.dump_python(books_data, mode="json")
-    return SuccessResponse(status=status.HTTP_200_OK, message="Books fetched successfully!", data=books_data)
+    next_cursor = encode_cursor(*next_key) if next_key else None
+    return SuccessResponse(status=status.HTTP_200_OK, message="Books fetched successfully!", data=books_data, next_cursor=next_cursor)
+
+
+async def export_books_stream(format: Literal["ndjson", "json"]):
+    # Own session: the request scoped one is closed before the body is streamed
+    async with async_session() as session:
+        first_chunk = True
+
+        if format == "json":
+            yield b"["
+
+        async for chunk in book_service.stream_books(Config.EXPORT_CHUNK_SIZE, session):
+            books_data = book_adapter.validate_python(chunk, from_attributes=True)
+
+            if format == "ndjson":
+                yield b"".join(book.model_dump_json().encode() + b"\n" for book in books_data)
+            else:
+                body = book_adapter.dump_json(books_data)[1:-1]
+                yield body if first_chunk else b"," + body
+
+            first_chunk = False
+            session.expunge_all()
+
+        if format == "json":
+            yield b"]"
+
+
+@book_router.get("/search")
+async def search_books(
+    q: str = Query(min_length=1, max_length=200),
+    fuzzy: bool = False,
+    page: tuple = Depends(get_page_params),
+    session: AsyncSession = Depends(get_session("read")),
+    _: dict = Depends(access_token_bearer),
+):
+    found_books, next_key = await book_service.search_books(q, fuzzy, *page, session)
+    books_data = book_adapter.validate_python(found_books, from_attributes=True)
+    next_cursor = encode_cursor(*next_key) if next_key else None
+    return SuccessResponse(status=status.HTTP_200_OK, message="Books searched successfully!", data=books_data, next_cursor=next_cursor)
+
+
+@book_router.get("/export")
+async def export_books(format: Literal["ndjson", "json"] = "ndjson", _: dict = Depends(access_token_bearer)):
+    media_type = "application/x-ndjson" if format == "ndjson" else "application/json"
+    return StreamingResponse(export_books_stream(format), media_type=media_type)
 
 
 @book_router.get("/{book_id}")
-async def get_book(book_id: int, session: AsyncSession = Depends(get_session), _: dict = Depends(access_token_bearer)):
-    current_book = await book_service.get_book(book_id, session)
-    if current_book:
-        book_data = BookModel.model_validate(current_book, from_attributes=True).model_dump(mode="json")
-        return SuccessResponse(status=status.HTTP_200_OK, message="Book fetched successfully!", data=book_data)
+async def get_book(book_id: int, _: dict = Depends(access_token_bearer)):
+    book_data = await book_service.get_book_json(book_id)
+    if book_data:
+        return CachedSuccessResponse(status=status.HTTP_200_OK, message="Book fetched successfully!", data=book_data)
     else:
         raise ErrorResponse(status=status.HTTP_404_NOT_FOUND, message="Book not found!")
 
 
 @book_router.get("/user/{user_id}")
-async def get_user_books(user_id: int, session: AsyncSession = Depends(get_session), _: dict = Depends(access_token_bearer)):
-    all_books = await book_service.get_user_books(user_id, session)
+async def get_user_books(
+    user_id: int, page: tuple = Depends(get_page_params), session: AsyncSession = Depends(get_session("read")), _: dict = Depends(access_token_bearer)
+):
+    all_books, next_key = await book_service.get_user_books(user_id, *page, session)
     books_data = book_adapter.validate_python(all_books, from_attributes=True)
-    books_data = book_adapter.dump_python(books_data, mode="json")
-    return SuccessResponse(status=status.HTTP_200_OK, message="Books fetched successfully!", data=books_data)
+    next_cursor = encode_cursor(*next_key) if next_key else None
+    return SuccessResponse(status=status.HTTP_200_OK, message="Books fetched successfully!", data=books_data, next_cursor=next_cursor)
 
 
 @book_router.patch("/{book_id}")
-async def update_book(book_id: int, update_data: BookUpdateModel, session: AsyncSession = Depends(get_session), token_data: dict = Depends(access_token_bearer)):
+async def update_book(book_id: int, update_data: BookUpdateModel, session: AsyncSession = Depends(get_session("write")), token_data: dict = Depends(access_token_bearer)):
     updated_book = await book_service.update_book(book_id, token_data["uid"], update_data, session)
 
     if updated_book:
-        book_data = BookModel.model_validate(updated_book, from_attributes=True).model_dump(mode="json")
+        book_data = BookModel.model_validate(updated_book, from_attributes=True)
         return SuccessResponse(status=status.HTTP_200_OK, message="Book updated successfully!", data=book_data)
     else:
         raise ErrorResponse(status=status.HTTP_404_NOT_FOUND, message="Book not found or You can't update!")
     
 
 @book_router.delete("/{book_id}")
-async def delete_book(book_id: int, session: AsyncSession = Depends(get_session), token_data: dict = Depends(access_token_bearer)):
+async def delete_book(book_id: int, session: AsyncSession = Depends(get_session("write")), token_data: dict = Depends(access_token_bearer)):
     book_to_delete = await book_service.delete_book(book_id, token_data["uid"], session)
 
     if book_to_delete:
@@ -1,4 +1,4 @@
-from pydantic import BaseModel, field_validator
+from pydantic import BaseModel, Field, field_validator
 from datetime import date, datetime
 from typing import Optional, List
 
@@ -16,6 +16,9 @@ class BookModel(BaseModel):
     published: Optional[date]
     pages: Optional[int]
     language: Optional[str]
+    review_count: int
+    rating_avg: float
+    rating_histogram: List[int]
     created_at: datetime
     updated_at: datetime
 
@@ -54,5 +57,13 @@ class BookUpdateModel(BookBaseModel):
     pass
 
 
+class BookBatchUpdateModel(BookUpdateModel):
+    id: int
+
+
+class BookBatchDeleteModel(BaseModel):
+    ids: List[int] = Field(min_length=1)
+
+
 class BookDetailModel(BookModel):
     reviews: List[ReviewModel]
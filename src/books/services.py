@@ -1,11 +1,47 @@
 from sqlmodel.ext.asyncio.session import AsyncSession
-from sqlmodel import desc, select
+from sqlalchemy.orm import selectinload
+from sqlalchemy import column, values
+from sqlmodel import case, delete, desc, func, insert, or_, select, tuple_, update
+from fastapi import status
+from redis.exceptions import RedisError
+from datetime import datetime
+from typing import List, Literal
+import logging
 
-from src.db.models import Book
-from .schemas import BookCreateModel, BookUpdateModel
+from src.lib.response import ErrorResponse
+from src.lib.utils import generate_ids, get_timestamp
+from src.db.models import Book, Review
+from src.db.redis import redis_delete_versioned, redis_read_through
+from src.db.main import primary_session
+from .schemas import BookModel, BookDetailModel, BookCreateModel, BookUpdateModel
+
+
+# Bump when cached book payloads change shape
+BOOK_CACHE_VERSION = 2
 
 
 class BookService:
+    @staticmethod
+    def cache_keys(book_id: int) -> tuple[str, str]:
+        prefix = f"cache:v{BOOK_CACHE_VERSION}:book:{book_id}"
+        return f"{prefix}:detail", f"{prefix}:reviews"
+
+    @staticmethod
+    def cache_version_key(book_id: int) -> str:
+        """Incremented on every write to the book, fills that loaded the row before it are dropped."""
+        return f"cache:book:{book_id}:version"
+
+    @staticmethod
+    async def invalidate_cache(*book_ids: int):
+        if not book_ids:
+            return
+
+        try:
+            await redis_delete_versioned(*((BookService.cache_version_key(book_id), BookService.cache_keys(book_id)) for book_id in book_ids))
+        except RedisError as e:
+            # The write is committed, cached payloads fall back to expiring after BOOK_CACHE_TTL
+            logging.warning("Book cache invalidation error: %s", e)
+
     @staticmethod
     async def create_book(book_data: BookCreateModel, user_id: int, session: AsyncSession):
         book_data_dict = book_data.model_dump()
@@ -16,10 +52,75 @@ class BookService:
         return new_book
 
     @staticmethod
-    async def get_all_books(session: AsyncSession):
-        statement = select(Book).order_by(desc(Book.created_at))
+    async def create_books(books_data: List[BookCreateModel], user_id: int, session: AsyncSession):
+        """Insert books with multi-row INSERT ... RETURNING."""
+        ids = generate_ids(len(books_data))
+        rows = [{**book_data.model_dump(), "id": book_id, "user_id": user_id} for book_id, book_data in zip(ids, books_data)]
+        result = await session.scalars(insert(Book).returning(Book), rows)
+        new_books = result.all()
+        await session.commit()
+        return new_books
+
+    @staticmethod
+    async def paginate_books(statement, limit: int, after: tuple | None, session: AsyncSession, order_column=Book.created_at):
+        if after is not None:
+            if not isinstance(after[0], order_column.type.python_type):
+                raise ErrorResponse(status=status.HTTP_400_BAD_REQUEST, message="Invalid cursor!")
+
+            statement = statement.where(tuple_(order_column, Book.id) < after)
+
+        statement = statement.order_by(desc(order_column), desc(Book.id)).limit(limit + 1)
+        result = await session.exec(statement)
+        books = result.all()
+
+        if len(books) > limit:
+            books = books[:limit]
+            return books, (getattr(books[-1], order_column.key), books[-1].id)
+        return books, None
+
+    @staticmethod
+    async def get_all_books(limit: int, after: tuple | None, session: AsyncSession, sort: Literal["recent", "rating"] = "recent"):
+        statement = select(Book)
+        order_column = Book.rating_avg if sort == "rating" else Book.created_at
+        return await BookService.paginate_books(statement, limit, after, session, order_column)
+
+    @staticmethod
+    async def search_books(query: str, fuzzy: bool, limit: int, after: tuple | None, session: AsyncSession):
+        """Ranked full-text search, or trigram similarity and prefix search when fuzzy."""
+        if fuzzy:
+            pattern = query.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + "%"
+            rank = func.greatest(func.similarity(Book.title, query), func.similarity(Book.author, query))
+            match = or_(Book.title.op("%")(query), Book.author.op("%")(query), Book.title.ilike(pattern), Book.author.ilike(pattern))
+        else:
+            search_vector = Book.__table__.c.search_vector
+            ts_query = func.websearch_to_tsquery("english", query)
+            rank = func.ts_rank_cd(search_vector, ts_query)
+            match = search_vector.op("@@")(ts_query)
+
+        statement = select(Book, rank.label("rank")).where(match)
+
+        if after is not None:
+            if not isinstance(after[0], float):
+                raise ErrorResponse(status=status.HTTP_400_BAD_REQUEST, message="Invalid cursor!")
+
+            statement = statement.where(tuple_(rank, Book.id) < after)
+
+        statement = statement.order_by(desc(rank), desc(Book.id)).limit(limit + 1)
         result = await session.exec(statement)
-        return result.all()
+        rows = result.all()
+        books = [book for book, _ in rows[:limit]]
+
+        if len(rows) > limit:
+            return books, (rows[limit - 1][1], rows[limit - 1][0].id)
+        return books, None
+
+    @staticmethod
+    async def stream_books(chunk_size: int, session: AsyncSession):
+        statement = select(Book).order_by(desc(Book.created_at), desc(Book.id)).execution_options(yield_per=chunk_size)
+        result = await session.stream_scalars(statement)
+
+        async for chunk in result.partitions():
+            yield chunk
 
     @staticmethod
     async def get_book(book_id: int, session: AsyncSession):
@@ -28,38 +129,128 @@ class BookService:
         return result.first()
 
     @staticmethod
-    async def get_user_books(user_id: int, session: AsyncSession):
-        statement = (select(Book).where(Book.user_id == user_id).order_by(desc(Book.created_at)))
+    async def get_book_with_reviews(book_id: int, session: AsyncSession):
+        statement = select(Book).options(selectinload(Book.reviews)).where(Book.id == book_id)
         result = await session.exec(statement)
-        return result.all()
+        return result.first()
+
+    @staticmethod
+    async def get_book_json(book_id: int) -> str | None:
+        async def load_book():
+            async with primary_session() as primary:
+                book = await BookService.get_book(book_id, primary)
+                return BookModel.model_validate(book, from_attributes=True).model_dump_json() if book else None
+
+        return await redis_read_through(BookService.cache_keys(book_id)[0], load_book, version_key=BookService.cache_version_key(book_id))
+
+    @staticmethod
+    async def get_book_reviews_json(book_id: int) -> str | None:
+        async def load_book_reviews():
+            async with primary_session() as primary:
+                book = await BookService.get_book_with_reviews(book_id, primary)
+                return BookDetailModel.model_validate(book, from_attributes=True).model_dump_json() if book else None
+
+        return await redis_read_through(BookService.cache_keys(book_id)[1], load_book_reviews, version_key=BookService.cache_version_key(book_id))
+
+    @staticmethod
+    async def get_user_books(user_id: int, limit: int, after: tuple | None, session: AsyncSession):
+        statement = select(Book).where(Book.user_id == user_id)
+        return await BookService.paginate_books(statement, limit, after, session)
+
+    @staticmethod
+    def rating_bucket(rating: float) -> int:
+        return min(max(int(rating + 0.5), 1), 5)
+
+    @staticmethod
+    async def update_rating_stats(book_id: int, session: AsyncSession, added: float | None = None, removed: float | None = None):
+        """Apply an added, removed or edited (both) review rating to the book aggregates."""
+        count = Book.review_count + int(added is not None) - int(removed is not None)
+        total = Book.rating_avg * Book.review_count + (added or 0) - (removed or 0)
+        values = {"review_count": count, "rating_avg": case((count > 0, total / count), else_=0), "updated_at": Book.updated_at}
+
+        for rating, step in ((added, 1), (removed, -1)):
+            if rating is not None:
+                column = f"rating_{BookService.rating_bucket(rating)}"
+                values[column] = values.get(column, getattr(Book, column)) + step
+
+        await session.exec(update(Book).where(Book.id == book_id).values(**values))
 
     @staticmethod
     async def update_book(book_id: int, user_id: int, update_data: BookUpdateModel, session: AsyncSession):
-        statement = select(Book).where(Book.id == book_id, Book.user_id == user_id)
-        result = await session.exec(statement)
-        book_to_update = result.first()
-
-        if book_to_update is not None:
-            update_data_dict = update_data.model_dump(exclude_unset=True)
-            
-            for k, v in update_data_dict.items():
-                setattr(book_to_update, k, v)
-            
+        statement = (
+            update(Book)
+            .where(Book.id == book_id, Book.user_id == user_id)
+            .values(**update_data.model_dump(exclude_unset=True))
+            .returning(Book)
+        )
+        result = await session.exec(statement, execution_options={"synchronize_session": False})
+        updated_book = result.scalars().first()
+        await session.commit()
+
+        if updated_book is not None:
+            await BookService.invalidate_cache(book_id)
+        return updated_book
+
+    @staticmethod
+    async def update_books(items: List[tuple[int, BookUpdateModel]], user_id: int, session: AsyncSession):
+        """Bulk update owned books with UPDATE ... FROM (VALUES ...) RETURNING, returns the updated ids.
+
+        Items setting the same fields share a statement, and ownership is part of its WHERE.
+        """
+        groups: dict[tuple[str, ...], dict[int, dict]] = {}
+        for book_id, update_data in items:
+            data = update_data.model_dump(exclude_unset=True, exclude={"id"})
+            groups.setdefault(tuple(sorted(data)), {})[book_id] = data
+
+        updated_ids = set()
+        for fields, rows in groups.items():
+            columns = [Book.__table__.c[name] for name in ("id", *fields)]
+            data = values(*(column(c.name, c.type) for c in columns), name="data").data(
+                [(book_id, *(row[name] for name in fields)) for book_id, row in rows.items()]
+            )
+            statement = (
+                update(Book)
+                .where(Book.id == data.c.id, Book.user_id == user_id)
+                .values(**{name: data.c[name] for name in fields}, updated_at=get_timestamp())
+                .returning(Book.id)
+            )
+            result = await session.exec(statement, execution_options={"synchronize_session": False})
+            updated_ids.update(result.scalars().all())
+
+        if updated_ids:
             await session.commit()
-            await session.refresh(book_to_update)
-            return book_to_update
-        else:
-            return None
+            await BookService.invalidate_cache(*updated_ids)
+        return updated_ids
+
+    @staticmethod
+    async def delete_books(book_ids: List[int], user_id: int, session: AsyncSession):
+        """Delete owned books in one statement, returns the deleted ids."""
+        statement = BookService.delete_owned_books(book_ids, user_id)
+        result = await session.exec(statement, execution_options={"synchronize_session": False})
+        deleted_ids = set(result.scalars().all())
+
+        await session.commit()
+        await BookService.invalidate_cache(*deleted_ids)
+        return deleted_ids
+
+    @staticmethod
+    def delete_owned_books(book_ids: List[int], user_id: int):
+        """DELETE of the owned books returning their ids, detaching their reviews in the same statement.
+
+        reviews.book_id has no ON DELETE rule, so the reviews keep existing without a book, as
+        session.delete() left them. The rating aggregates are on the deleted book rows.
+        """
+        owned = (Book.id.in_(book_ids), Book.user_id == user_id)
+        detached = update(Review).where(Review.book_id.in_(select(Book.id).where(*owned))).values(book_id=None).returning(Review.id).cte("detached_reviews")
+        return delete(Book).where(*owned).add_cte(detached).returning(Book.id)
 
     @staticmethod
     async def delete_book(book_id: int, user_id: int, session: AsyncSession):
-        statement = select(Book).where(Book.id == book_id, Book.user_id == user_id)
-        result = await session.exec(statement)
-        book_to_delete = result.first()
+        statement = BookService.delete_owned_books([book_id], user_id)
+        result = await session.exec(statement, execution_options={"synchronize_session": False})
+        deleted_id = result.scalars().first()
+        await session.commit()
 
-        if book_to_delete is not None:
-            await session.delete(book_to_delete)
-            await session.commit()
-            return True
-        else:
-            return False
+        if deleted_id is not None:
+            await BookService.invalidate_cache(book_id)
+        return deleted_id is not None
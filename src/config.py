@@ -1,15 +1,116 @@
 from pydantic_settings import BaseSettings, SettingsConfigDict
+from pydantic import model_validator
+from typing import Literal
+import math
+import os
+
+
+def read_cpu_quota() -> float | None:
+    """CPUs allowed by the cgroup (v2, then v1) CPU quota, None when unlimited."""
+    try:
+        with open("/sys/fs/cgroup/cpu.max") as f:
+            quota, period = f.read().split()[:2]
+    except (OSError, ValueError):
+        try:
+            with open("/sys/fs/cgroup/cpu/cpu.cfs_quota_us") as f, open("/sys/fs/cgroup/cpu/cpu.cfs_period_us") as g:
+                quota, period = f.read().strip(), g.read().strip()
+        except OSError:
+            return None
+
+    if quota in ("max", "-1") or int(period) <= 0:
+        return None
+    return int(quota) / int(period)
+
+
+def available_cpus() -> int:
+    """CPUs this process may run on, os.cpu_count() ignores affinity masks and container quotas."""
+    cpus = len(os.sched_getaffinity(0)) if hasattr(os, "sched_getaffinity") else os.cpu_count() or 1
+    quota = read_cpu_quota()
+    return max(1, min(cpus, math.ceil(quota))) if quota else cpus
 
 
 class Settings(BaseSettings):
+    ENVIRONMENT: Literal["development", "production"] = "development"
     DATABASE_URL: str
     REDIS_URL: str
     JWT_SECRET: str
     JWT_ALGORITHM: str
+    JWT_BACKEND: Literal["jose", "pyjwt"] = "pyjwt"
+    JWT_CACHE_SIZE: int = 10000
     ACCESS_EXPIRY: int = 3600
     REFRESH_EXPIRY: int = 3600 * 24
+    BCRYPT_ROUNDS: int = 12
+    BCRYPT_WORKERS: int = 4
+    SIGNUP_BATCH_MAX: int = 100
+    SIGNUP_IMPORT_TOKEN: str = ""
+    DB_ECHO: bool = False
+    DB_POOL_SIZE: int = 5
+    DB_MAX_OVERFLOW: int = 10
+    DB_POOL_TIMEOUT: int = 30
+    DB_POOL_RECYCLE: int = 1800
+    DB_POOL_PRE_PING: bool = True
+    DB_STATEMENT_CACHE_SIZE: int = 100
+    REDIS_MAX_CONNECTIONS: int = 50
+    REDIS_SOCKET_TIMEOUT: float = 5.0
+    REDIS_CONNECT_TIMEOUT: float = 5.0
+    REDIS_HEALTH_CHECK_INTERVAL: int = 30
+    BOOK_CACHE_TTL: int = 300
+    LOCAL_CACHE_SIZE: int = 10000
+    LOCAL_CACHE_TTL: int = 30
+    PAGE_SIZE: int = 20
+    MAX_PAGE_SIZE: int = 100
+    EXPORT_CHUNK_SIZE: int = 500
+    BOOK_BATCH_MAX: int = 1000
+    TAG_BATCH_MAX: int = 50
+    LOG_LEVEL: str = "INFO"
+    LOG_ACCESS_LEVEL: str = "INFO"
+    LOG_ACCESS_SAMPLE_RATE: float = 1.0
+    SERVER: Literal["uvicorn", "granian"] = "uvicorn"
+    HOST: str = "localhost"
+    PORT: int = 4000
+    WORKERS: int = 1
+    SERVER_LOOP: Literal["auto", "asyncio", "uvloop"] = "auto"
+    SERVER_HTTP: Literal["auto", "h11", "httptools"] = "auto"
+    SERVER_BACKLOG: int = 2048
+    SERVER_KEEP_ALIVE: int = 5
+    SERVER_GRACEFUL_TIMEOUT: int = 30
+    DB_MAX_CONNECTIONS: int = 0
+    SNOWFLAKE_SHARD_ID: int = 1
+    SNOWFLAKE_SHARD_LEASE: bool | None = None
+    SNOWFLAKE_LEASE_TTL: int = 30
+    DB_STARTUP: Literal["create_all", "check"] = "create_all"
+    REDIS_WARM_CONNECTIONS: int = 5
+    DB_REPLICA_URLS: str = ""
+    DB_REPLICA_CONNECT_TIMEOUT: float = 2.0
+    DB_REPLICA_COOLDOWN: float = 10.0
+    DB_READ_STICKY_SECONDS: float = 5.0
+    HEALTH_PROBE_INTERVAL: float = 2.0
+    HEALTH_PROBE_TIMEOUT: float = 1.0
+    HEALTH_MAX_SATURATION: float = 0.9
 
     model_config = SettingsConfigDict(env_file=".env", extra="ignore")
 
+    @model_validator(mode="after")
+    def size_per_worker(self) -> "Settings":
+        """Resolve WORKERS=0 to one per available CPU, split DB_MAX_CONNECTIONS across the workers and lease shard ids with several of them."""
+        if self.WORKERS <= 0:
+            # Every worker needs at least one of the DB_MAX_CONNECTIONS
+            self.WORKERS = min(available_cpus(), self.DB_MAX_CONNECTIONS) if self.DB_MAX_CONNECTIONS > 0 else available_cpus()
+
+        # Workers sharing SNOWFLAKE_SHARD_ID would issue the same ids in the same millisecond
+        if self.SNOWFLAKE_SHARD_LEASE is None:
+            self.SNOWFLAKE_SHARD_LEASE = self.WORKERS > 1
+        elif not self.SNOWFLAKE_SHARD_LEASE and self.WORKERS > 1:
+            raise ValueError("SNOWFLAKE_SHARD_LEASE can't be disabled with several WORKERS, their snowflake ids would collide!")
+
+        if self.DB_MAX_CONNECTIONS > 0:
+            if self.WORKERS > self.DB_MAX_CONNECTIONS:
+                raise ValueError(f"DB_MAX_CONNECTIONS={self.DB_MAX_CONNECTIONS} can't give each of {self.WORKERS} WORKERS a DB connection!")
+
+            per_worker = self.DB_MAX_CONNECTIONS // self.WORKERS
+            self.DB_POOL_SIZE = min(self.DB_POOL_SIZE, per_worker)
+            self.DB_MAX_OVERFLOW = per_worker - self.DB_POOL_SIZE
+        return self
+
 
 Config = Settings()
@@ -1,29 +1,249 @@
-from sqlalchemy.ext.asyncio import AsyncEngine
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy.ext.asyncio import AsyncConnection, AsyncEngine, create_async_engine, async_sessionmaker
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+from sqlalchemy import event
 from sqlmodel.ext.asyncio.session import AsyncSession
-from sqlmodel import SQLModel, create_engine, text
-from typing import Any
+from sqlmodel import Session, SQLModel, text
+from redis.exceptions import RedisError
+from fastapi import Request
+from contextlib import asynccontextmanager
+from pathlib import Path
+from typing import Any, AsyncGenerator, Callable, Literal
+import asyncio
+import logging
+import time
 
+from src.db.redis import redis_client
+from src.lib.utils import decode_jwt_token
 from src.config import Config
 
 
-async_engine = AsyncEngine(create_engine(url=Config.DATABASE_URL, echo=True))
+pool_wait = {"count": 0, "total": 0.0, "max": 0.0}
 
 
-async def test_db() -> None:
-    async with async_engine.begin() as connection:
-        statement = text("SELECT 'hello';")
-        result = await connection.execute(statement)
-        print("Connection Result:", result.all())
+class TimedQueuePool(AsyncAdaptedQueuePool):
+    """Queue pool that records how long checkouts wait for a connection to be returned.
+
+    Pool events don't fire before a checkout starts, so the public connect() is timed,
+    and only when the pool's public counters show no idle connection and no overflow left.
+    """
+
+    def connect(self):
+        if self.checkedin() > 0 or Config.DB_MAX_OVERFLOW < 0 or self.overflow() < Config.DB_MAX_OVERFLOW:
+            return super().connect()
+
+        start_time = time.perf_counter()
+        try:
+            return super().connect()
+        finally:
+            waited = time.perf_counter() - start_time
+            pool_wait["count"] += 1
+            pool_wait["total"] += waited
+            pool_wait["max"] = max(pool_wait["max"], waited)
+
+
+async_engine = create_async_engine(
+    url=Config.DATABASE_URL,
+    echo=Config.DB_ECHO,
+    poolclass=TimedQueuePool,
+    pool_size=Config.DB_POOL_SIZE,
+    max_overflow=Config.DB_MAX_OVERFLOW,
+    pool_timeout=Config.DB_POOL_TIMEOUT,
+    pool_recycle=Config.DB_POOL_RECYCLE,
+    pool_pre_ping=Config.DB_POOL_PRE_PING,
+    connect_args={"prepared_statement_cache_size": Config.DB_STATEMENT_CACHE_SIZE},
+)
+
+async_session = async_sessionmaker(bind=async_engine, class_=AsyncSession, expire_on_commit=False)
+
+logger = logging.getLogger("bookly.db")
+
+STICKY_KEY = "db:sticky:{}"
+
+
+class ReplicaRouter:
+    """Round-robin over read replica engines, skipping a replica for DB_REPLICA_COOLDOWN seconds after it fails."""
+
+    def __init__(self, urls: list[str]):
+        self.engines = [
+            create_async_engine(
+                url=url,
+                echo=Config.DB_ECHO,
+                pool_size=Config.DB_POOL_SIZE,
+                max_overflow=Config.DB_MAX_OVERFLOW,
+                pool_timeout=Config.DB_POOL_TIMEOUT,
+                pool_recycle=Config.DB_POOL_RECYCLE,
+                pool_pre_ping=Config.DB_POOL_PRE_PING,
+                connect_args={"prepared_statement_cache_size": Config.DB_STATEMENT_CACHE_SIZE, "timeout": Config.DB_REPLICA_CONNECT_TIMEOUT},
+            )
+            for url in urls
+        ]
+        self.down_until = [0.0] * len(self.engines)
+        self.next = 0
+
+    async def connect(self) -> AsyncConnection | None:
+        """Connection to the next healthy replica, or None when every replica is down."""
+        start, count = self.next, len(self.engines)
+        self.next = (start + 1) % count
+        now = time.monotonic()
+
+        for offset in range(count):
+            index = (start + offset) % count
+            if self.down_until[index] > now:
+                continue
+
+            try:
+                return await self.engines[index].connect()
+            except (OSError, asyncio.TimeoutError, SQLAlchemyError) as e:
+                logger.warning("Read replica %s is unavailable, skipping it for %ss: %s", index, Config.DB_REPLICA_COOLDOWN, e)
+                self.mark_down(index)
+        return None
+
+    def mark_down(self, index: int):
+        self.down_until[index] = time.monotonic() + Config.DB_REPLICA_COOLDOWN
+
+
+replica_urls = [url.strip() for url in Config.DB_REPLICA_URLS.split(",") if url.strip()]
+replica_router = ReplicaRouter(replica_urls) if replica_urls else None
+
+
+@event.listens_for(Session, "after_commit")
+def mark_committed(session: Session):
+    session.info["committed"] = True
+
+
+def get_request_user_id(request: Request) -> str | None:
+    scheme, _, token = request.headers.get("authorization", "").partition(" ")
+    token_data = decode_jwt_token(token) if scheme.lower() == "bearer" and token else None
+    return token_data["uid"] if token_data else None
+
+
+async def is_sticky(user_id: str | None) -> bool:
+    """Whether the user wrote within DB_READ_STICKY_SECONDS, their reads then go to the primary."""
+    if user_id is None:
+        return False
+
+    try:
+        return bool(await redis_client.exists(STICKY_KEY.format(user_id)))
+    except RedisError as e:
+        logger.warning("Read stickiness check error: %s", e)
+        return True
+
+
+async def ping_db(engine: AsyncEngine = async_engine) -> None:
+    async with engine.connect() as connection:
+        await connection.execute(text("SELECT 1;"))
 
 
 async def init_db() -> None:
     async with async_engine.begin() as connection:
         # from .models import User, Book, Review
+        await connection.execute(text("CREATE EXTENSION IF NOT EXISTS pg_trgm;"))
         await connection.run_sync(SQLModel.metadata.create_all)
 
 
-async def get_session() -> Any:
-    current_session = sessionmaker(bind=async_engine, class_=AsyncSession, expire_on_commit=False)
-    async with current_session() as session:
+async def check_db_head() -> str:
+    """Fail fast unless the database is at the latest Alembic revision, instead of running create_all."""
+    from alembic.config import Config as AlembicConfig
+    from alembic.script import ScriptDirectory
+
+    alembic_config = AlembicConfig(Path(__file__).parents[2] / "alembic.ini")
+    head = ScriptDirectory.from_config(alembic_config).get_current_head()
+
+    async with async_engine.connect() as connection:
+        result = await connection.execute(text("SELECT version_num FROM alembic_version;"))
+        current = result.scalar()
+
+    if current != head:
+        raise RuntimeError(f"Database is at revision {current}, expected {head}, run `alembic upgrade head`!")
+    return current
+
+
+async def warm_db_pool() -> None:
+    """Open DB_POOL_SIZE connections up front, so the first requests don't pay for connecting."""
+    await asyncio.gather(*(ping_db() for _ in range(Config.DB_POOL_SIZE)))
+
+
+async def write_session(request: Request) -> AsyncGenerator[AsyncSession, Any]:
+    async with async_session() as session:
         yield session
+
+        # Runs before the response is sent, so the user's next read already sees the write
+        if replica_router and session.info.get("committed") and (user_id := get_request_user_id(request)):
+            try:
+                await redis_client.set(STICKY_KEY.format(user_id), 1, px=int(Config.DB_READ_STICKY_SECONDS * 1000))
+            except RedisError as e:
+                logger.warning("Read stickiness mark error: %s", e)
+
+
+async def read_session(request: Request) -> AsyncGenerator[AsyncSession, Any]:
+    """Session on a read replica, or on the primary without healthy replicas or right after the user wrote."""
+    connection = None
+    if replica_router and not await is_sticky(get_request_user_id(request)):
+        connection = await replica_router.connect()
+
+    if connection is None:
+        async with async_session() as session:
+            yield session
+        return
+
+    try:
+        async with async_session(bind=connection, info={"replica": True}) as session:
+            yield session
+    finally:
+        await connection.close()
+
+
+@asynccontextmanager
+async def primary_session(session: AsyncSession | None = None) -> AsyncGenerator[AsyncSession, Any]:
+    """The session itself when it is on the primary, otherwise a new primary session.
+
+    Shared caches are filled through it, a lagging replica would cache rows that were already updated.
+    """
+    if session is not None and not session.info.get("replica"):
+        yield session
+        return
+
+    async with async_session() as primary:
+        yield primary
+
+
+def get_session(intent: Literal["read", "write"] = "write") -> Callable[..., AsyncGenerator[AsyncSession, Any]]:
+    """Session dependency for the intent, reads may be served by a replica."""
+    return read_session if intent == "read" else write_session
+
+
+async def dispose_engines() -> None:
+    engines: list[AsyncEngine] = [async_engine, *(replica_router.engines if replica_router else [])]
+    await asyncio.gather(*(engine.dispose() for engine in engines))
+
+
+def get_pool_usage(engine: AsyncEngine) -> dict:
+    pool = engine.pool
+    return {
+        "size": pool.size(),
+        "checked_in": pool.checkedin(),
+        "checked_out": pool.checkedout(),
+        "overflow": pool.overflow(),
+        "max_overflow": Config.DB_MAX_OVERFLOW,
+    }
+
+
+def get_replica_pool_stats() -> list[dict]:
+    """Connection pool usage of each read replica, and whether reads currently skip it."""
+    if replica_router is None:
+        return []
+
+    now = time.monotonic()
+    return [{**get_pool_usage(engine), "down": down_until > now} for engine, down_until in zip(replica_router.engines, replica_router.down_until)]
+
+
+def get_pool_stats() -> dict:
+    """Get connection pool usage and the wait times of checkouts that found the pool exhausted."""
+    return {
+        **get_pool_usage(async_engine),
+        "waits": pool_wait["count"],
+        "wait_total": pool_wait["total"],
+        "wait_avg": pool_wait["total"] / pool_wait["count"] if pool_wait["count"] else 0.0,
+        "wait_max": pool_wait["max"],
+    }
@@ -5,7 +5,7 @@ import sqlalchemy.dialects.postgresql as pg
 from datetime import datetime, date
 from typing import Optional, List
 
-from src.lib.utils import generate_id, get_timestamp, generate_suffix 
+from src.lib.utils import generate_id, get_timestamp, to_base36
 
 
 class User(SQLModel, table=True):
@@ -26,33 +26,41 @@ class User(SQLModel, table=True):
     created_at: datetime = Field(sa_column=Column(pg.TIMESTAMP(timezone=True), default=get_timestamp, nullable=False))
     updated_at: datetime = Field(sa_column=Column(pg.TIMESTAMP(timezone=True), default=get_timestamp, onupdate=get_timestamp, nullable=False))
 
-    books: List["Book"] = Relationship(back_populates="user", sa_relationship_kwargs={"lazy": "selectin"})
-    reviews: List["Review"] = Relationship(back_populates="user", sa_relationship_kwargs={"lazy": "selectin"})
+    books: List["Book"] = Relationship(back_populates="user")
+    reviews: List["Review"] = Relationship(back_populates="user")
 
     def __repr__(self):
         return f"<User: {self.id} ({self.username or self.email})>"    
 
 
+def default_username(email: str, user_id: int) -> str:
+    """Username from the email's local part and the snowflake id.
+
+    The suffix makes it unique without a lookup, and the "." separator can't
+    appear in usernames chosen through profile updates.
+    """
+    local_part = email.split("@")[0].split(".")[0][:30]
+    return f"{local_part}.{to_base36(user_id)}"
+
+
 # Event Listener for set username (runs before INSERT)
 @event.listens_for(User, "before_insert")
 def set_unique_username(mapper, connection, target: User):
     """Auto-generate username if missing."""
     if not target.username or target.username.strip() == "":
-        local_part = target.email.split("@")[0].split(".")[0]
-
-        candidate = f"{local_part}_{generate_suffix()}"
+        if target.id is None:
+            target.id = generate_id()
 
-        while connection.execute(
-            sa.text("SELECT 1 FROM users WHERE username = :u"),
-            {"u": candidate}
-        ).first():
-            candidate = f"{local_part}_{generate_suffix()}"
-
-        target.username = candidate
+        target.username = default_username(target.email, target.id)
 
 
 class Book(SQLModel, table=True):
     __tablename__ = "books"
+    __table_args__ = (
+        sa.Index("ix_books_created_at_id", sa.text("created_at DESC"), sa.text("id DESC")),
+        sa.Index("ix_books_user_id_created_at_id", "user_id", sa.text("created_at DESC"), sa.text("id DESC")),
+        sa.Index("ix_books_rating_avg_id", sa.text("rating_avg DESC"), sa.text("id DESC")),
+    )
 
     id: int = Field(sa_column=Column(pg.BIGINT, primary_key=True, index=True, nullable=False, default=generate_id))
 
@@ -68,19 +76,47 @@ class Book(SQLModel, table=True):
     pages: Optional[int] = Field(sa_column=Column(pg.BIGINT, nullable=True, default=None))
     language: Optional[str] = Field(sa_column=Column(pg.VARCHAR(200), nullable=True, default=None))
 
+    review_count: int = Field(sa_column=Column(pg.BIGINT, nullable=False, default=0, server_default="0"))
+    rating_avg: float = Field(sa_column=Column(pg.FLOAT, nullable=False, default=0, server_default="0"))
+    rating_1: int = Field(sa_column=Column(pg.BIGINT, nullable=False, default=0, server_default="0"))
+    rating_2: int = Field(sa_column=Column(pg.BIGINT, nullable=False, default=0, server_default="0"))
+    rating_3: int = Field(sa_column=Column(pg.BIGINT, nullable=False, default=0, server_default="0"))
+    rating_4: int = Field(sa_column=Column(pg.BIGINT, nullable=False, default=0, server_default="0"))
+    rating_5: int = Field(sa_column=Column(pg.BIGINT, nullable=False, default=0, server_default="0"))
+
     created_at: datetime = Field(sa_column=Column(pg.TIMESTAMP(timezone=True), default=get_timestamp, nullable=False))
     updated_at: datetime = Field(sa_column=Column(pg.TIMESTAMP(timezone=True), default=get_timestamp, onupdate=get_timestamp, nullable=False))
 
     user_id: Optional[int] = Field(sa_column=Column(pg.BIGINT, ForeignKey("users.id"), nullable=True, default=None))
     
-    reviews: List["Review"] = Relationship(back_populates="book", sa_relationship_kwargs={"lazy": "selectin"})
+    reviews: List["Review"] = Relationship(back_populates="book")
     
     user: Optional[User] = Relationship(back_populates="books")
 
+    @property
+    def rating_histogram(self) -> List[int]:
+        return [self.rating_1, self.rating_2, self.rating_3, self.rating_4, self.rating_5]
+
     def __repr__(self):
         return f"<Book: {self.id} ({self.title})>"
 
 
+BOOK_SEARCH_EXPRESSION = (
+    "setweight(to_tsvector('english', coalesce(title, '')), 'A') || "
+    "setweight(to_tsvector('english', coalesce(subtitle, '')), 'B') || "
+    "setweight(to_tsvector('english', coalesce(author, '')), 'B') || "
+    "setweight(to_tsvector('english', coalesce(publisher, '')), 'C') || "
+    "setweight(to_tsvector('english', coalesce(description, '')), 'D')"
+)
+
+# Left unmapped so select(Book) never loads it, queries use Book.__table__.c.search_vector
+Book.__table__.append_column(Column("search_vector", pg.TSVECTOR, sa.Computed(BOOK_SEARCH_EXPRESSION, persisted=True), nullable=True))
+
+sa.Index("ix_books_search_vector", Book.__table__.c.search_vector, postgresql_using="gin")
+sa.Index("ix_books_title_trgm", Book.__table__.c.title, postgresql_using="gin", postgresql_ops={"title": "gin_trgm_ops"})
+sa.Index("ix_books_author_trgm", Book.__table__.c.author, postgresql_using="gin", postgresql_ops={"author": "gin_trgm_ops"})
+
+
 class Review(SQLModel, table=True):
     __tablename__ = "reviews"
 
@@ -100,3 +136,59 @@ class Review(SQLModel, table=True):
 
     def __repr__(self):
         return f"<Review for book {self.book_id} by user {self.user_id}>"
+
+
+class Tag(SQLModel, table=True):
+    __tablename__ = "tags"
+    __table_args__ = (
+        sa.Index("ix_tags_book_count_id", sa.text("book_count DESC"), sa.text("id DESC")),
+    )
+
+    id: int = Field(sa_column=Column(pg.BIGINT, primary_key=True, index=True, nullable=False, default=generate_id))
+
+    name: str = Field(sa_column=Column(pg.VARCHAR(50), nullable=False, unique=True))
+    book_count: int = Field(sa_column=Column(pg.BIGINT, nullable=False, default=0, server_default="0"))
+
+    created_at: datetime = Field(sa_column=Column(pg.TIMESTAMP(timezone=True), default=get_timestamp, nullable=False))
+
+    def __repr__(self):
+        return f"<Tag: {self.id} ({self.name})>"
+
+
+class BookTag(SQLModel, table=True):
+    __tablename__ = "book_tags"
+    __table_args__ = (
+        sa.Index("ix_book_tags_tag_id_book_id", "tag_id", "book_id"),
+    )
+
+    book_id: int = Field(sa_column=Column(pg.BIGINT, ForeignKey("books.id", ondelete="CASCADE"), primary_key=True, nullable=False))
+    tag_id: int = Field(sa_column=Column(pg.BIGINT, ForeignKey("tags.id", ondelete="CASCADE"), primary_key=True, nullable=False))
+
+    created_at: datetime = Field(sa_column=Column(pg.TIMESTAMP(timezone=True), default=get_timestamp, nullable=False))
+
+    def __repr__(self):
+        return f"<BookTag: book {self.book_id} tag {self.tag_id}>"
+
+
+# Keeps tags.book_count exact, including links removed by cascading book deletes
+BOOK_TAG_COUNT_TRIGGER = [
+    """
+    CREATE OR REPLACE FUNCTION book_tags_count() RETURNS trigger AS $$
+    BEGIN
+        IF TG_OP = 'INSERT' THEN
+            UPDATE tags SET book_count = book_count + 1 WHERE id = NEW.tag_id;
+        ELSE
+            UPDATE tags SET book_count = book_count - 1 WHERE id = OLD.tag_id;
+        END IF;
+        RETURN NULL;
+    END;
+    $$ LANGUAGE plpgsql
+    """,
+    """
+    CREATE TRIGGER book_tags_count AFTER INSERT OR DELETE ON book_tags
+    FOR EACH ROW EXECUTE FUNCTION book_tags_count()
+    """,
+]
+
+for statement in BOOK_TAG_COUNT_TRIGGER:
+    event.listen(BookTag.__table__, "after_create", sa.DDL(statement).execute_if(dialect="postgresql"))
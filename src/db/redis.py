@@ -1,10 +1,50 @@
 import redis.asyncio as aioredis
+from redis.exceptions import RedisError
+from typing import Awaitable, Callable
+import asyncio
 import json
+import logging
+import math
+import random
+import time
 
 from src.config import Config
+from src.lib.cache import LocalCache
 
 
-redis_client = aioredis.from_url(Config.REDIS_URL, decode_responses=True)
+redis_client = aioredis.from_url(
+    Config.REDIS_URL,
+    decode_responses=True,
+    max_connections=Config.REDIS_MAX_CONNECTIONS,
+    socket_timeout=Config.REDIS_SOCKET_TIMEOUT,
+    socket_connect_timeout=Config.REDIS_CONNECT_TIMEOUT,
+    health_check_interval=Config.REDIS_HEALTH_CHECK_INTERVAL,
+)
+
+local_cache = LocalCache(maxsize=Config.LOCAL_CACHE_SIZE, ttl=Config.LOCAL_CACHE_TTL)
+
+INVALIDATE_CHANNEL = "cache:invalidate"
+
+# Seconds a pub/sub read waits for a message before polling again, idle waits are not errors
+PUBSUB_POLL_TIMEOUT = 1.0
+PUBSUB_MAX_BACKOFF = 30.0
+
+# Store a cache fill only if the version key guarding it is unchanged since the load started
+FILL_SCRIPT = """
+if (redis.call('get', KEYS[2]) or '') ~= ARGV[1] then
+    return 0
+end
+redis.call('hset', KEYS[1], 'value', ARGV[2], 'delta', ARGV[3], 'expiry', ARGV[4])
+redis.call('expire', KEYS[1], ARGV[5])
+return 1
+"""
+
+inflight_loads: dict[str, asyncio.Task] = {}
+
+
+async def warm_redis_pool():
+    """Open REDIS_WARM_CONNECTIONS connections up front."""
+    await asyncio.gather(*(redis_client.ping() for _ in range(Config.REDIS_WARM_CONNECTIONS)))
 
 
 async def redis_set_json(key: str, value: dict, expire = Config.ACCESS_EXPIRY):
@@ -12,15 +52,167 @@ async def redis_set_json(key: str, value: dict, expire = Config.ACCESS_EXPIRY):
     return await redis_client.set(key, data, ex=expire)
 
 
-async def redis_get_json(key: str) -> dict | None:
+async def redis_get_json(key: str, cached: bool = False) -> dict | None:
+    if cached and (value := local_cache.get(key)) is not None:
+        return value
+
+    generation = local_cache.generation
     data = await redis_client.get(key)
-    return json.loads(data) if data else None
+    value = json.loads(data) if data else None
+
+    if cached and value is not None:
+        local_cache.set(key, value, generation=generation)
+    return value
 
 
 async def redis_set_string(key: str, value: str, expire = Config.ACCESS_EXPIRY):
     return await redis_client.set(key, value, ex=expire)
 
 
-async def redis_get_string(key: str) -> str | None:
+async def redis_get_string(key: str, cached: bool = False) -> str | None:
+    if cached and (value := local_cache.get(key)) is not None:
+        return value
+
+    generation = local_cache.generation
     data = await redis_client.get(key)
+
+    if cached and data:
+        local_cache.set(key, data, generation=generation)
     return data if data else None
+
+
+async def redis_set_many(*items: tuple[str, dict | str, int], invalidate: bool = False) -> bool:
+    """Set (key, value, expire) items in one round trip, dicts are stored as json."""
+    async with redis_client.pipeline() as pipe:
+        for key, value, expire in items:
+            pipe.set(key, value if isinstance(value, str) else json.dumps(value), ex=expire)
+
+        if invalidate:
+            pipe.publish(INVALIDATE_CHANNEL, json.dumps([key for key, _, _ in items]))
+
+        results = await pipe.execute()
+
+    if invalidate:
+        local_cache.pop(*(key for key, _, _ in items))
+    return all(results[:len(items)])
+
+
+async def redis_get_many(*keys: str) -> list[str | None]:
+    return await redis_client.mget(keys)
+
+
+async def redis_delete_many(*keys: str, invalidate: bool = False) -> int:
+    """Delete keys in one round trip, optionally evicting them in every worker."""
+    async with redis_client.pipeline() as pipe:
+        pipe.delete(*keys)
+
+        if invalidate:
+            pipe.publish(INVALIDATE_CHANNEL, json.dumps(keys))
+
+        results = await pipe.execute()
+
+    if invalidate:
+        local_cache.pop(*keys)
+    return results[0]
+
+
+async def redis_delete_versioned(*items: tuple[str, tuple[str, ...]], expire: int = Config.BOOK_CACHE_TTL):
+    """Delete (version_key, keys) items and increment their version keys in one round trip.
+
+    Fills of those keys that loaded before the increment are then dropped instead of stored.
+    """
+    async with redis_client.pipeline() as pipe:
+        for version_key, keys in items:
+            pipe.incr(version_key)
+            pipe.expire(version_key, expire)
+            pipe.delete(*keys)
+        await pipe.execute()
+
+
+async def redis_listen_invalidations():
+    """Evict local cache entries published by other workers, until cancelled."""
+    backoff = 1.0
+
+    while True:
+        pubsub = redis_client.pubsub(ignore_subscribe_messages=True)
+
+        try:
+            await pubsub.subscribe(INVALIDATE_CHANNEL)
+            backoff = 1.0
+
+            while True:
+                # Bounded waits instead of listen(), an idle channel would otherwise hit socket_timeout
+                message = await pubsub.get_message(timeout=PUBSUB_POLL_TIMEOUT)
+
+                if message is None:
+                    continue
+
+                try:
+                    local_cache.pop(*json.loads(message["data"]))
+                except (ValueError, TypeError) as e:
+                    # The keys are unknown, so every entry may be stale
+                    logging.warning("Malformed cache invalidation %r: %s", message["data"], e)
+                    local_cache.clear()
+        except Exception as e:
+            # Invalidations may have been missed while disconnected
+            logging.warning("Cache invalidation listener error: %s", e, exc_info=not isinstance(e, RedisError))
+            local_cache.clear()
+            await asyncio.sleep(backoff)
+            backoff = min(backoff * 2, PUBSUB_MAX_BACKOFF)
+        finally:
+            await pubsub.aclose()
+
+
+async def redis_fill(key: str, loader: Callable[[], Awaitable[str | None]], expire: int, version_key: str | None = None) -> str | None:
+    version = None
+    if version_key is not None:
+        try:
+            version = await redis_client.get(version_key) or ""
+        except RedisError as e:
+            logging.warning("Cache version read error: %s", e)
+
+    start_time = time.perf_counter()
+    value = await loader()
+    delta = time.perf_counter() - start_time
+
+    # Without a version to check against, the value may already be stale, so it isn't stored
+    if value is not None and (version_key is None or version is not None):
+        try:
+            if version_key is None:
+                async with redis_client.pipeline() as pipe:
+                    pipe.hset(key, mapping={"value": value, "delta": delta, "expiry": time.time() + expire})
+                    pipe.expire(key, expire)
+                    await pipe.execute()
+            else:
+                await redis_client.eval(FILL_SCRIPT, 2, key, version_key, version, value, delta, time.time() + expire, expire)
+        except RedisError as e:
+            logging.warning("Cache fill error: %s", e)
+    return value
+
+
+async def redis_read_through(
+    key: str, loader: Callable[[], Awaitable[str | None]], expire: int = Config.BOOK_CACHE_TTL, version_key: str | None = None
+) -> str | None:
+    """Get cached value or load it, None results are not cached.
+
+    Concurrent misses in a worker share one load, so the loader must not use a request's
+    session. Entries are refreshed early with a probability rising towards expiry so they
+    don't all miss at once. A fill is dropped if version_key changed while it loaded.
+    """
+    try:
+        cached = await redis_client.hgetall(key)
+    except RedisError as e:
+        logging.warning("Cache read error: %s", e)
+        cached = None
+
+    if cached:
+        refresh_at = float(cached["expiry"]) + float(cached["delta"]) * math.log(random.random() or 1e-12)
+        if time.time() < refresh_at:
+            return cached["value"]
+
+    task = inflight_loads.get(key)
+
+    if task is None:
+        task = inflight_loads[key] = asyncio.create_task(redis_fill(key, loader, expire, version_key))
+        task.add_done_callback(lambda _: inflight_loads.pop(key, None))
+    return await asyncio.shield(task)
@@ -0,0 +1,49 @@
+from collections import OrderedDict
+from typing import Any
+import time
+
+
+class LocalCache:
+    """Bounded in-process LRU cache with per-entry TTL.
+
+    generation goes up on every eviction. A fill passes the generation it read before
+    loading, and is dropped if an eviction happened meanwhile, as the value may be stale.
+    """
+
+    def __init__(self, maxsize: int, ttl: float):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.entries: OrderedDict[str, tuple[float, Any]] = OrderedDict()
+        self.generation = 0
+
+    def get(self, key: str) -> Any | None:
+        entry = self.entries.get(key)
+
+        if entry is None:
+            return None
+
+        if entry[0] < time.monotonic():
+            del self.entries[key]
+            return None
+
+        self.entries.move_to_end(key)
+        return entry[1]
+
+    def set(self, key: str, value: Any, ttl: float | None = None, generation: int | None = None):
+        if self.maxsize <= 0 or (generation is not None and generation != self.generation):
+            return
+
+        self.entries[key] = (time.monotonic() + (self.ttl if ttl is None else ttl), value)
+        self.entries.move_to_end(key)
+
+        while len(self.entries) > self.maxsize:
+            self.entries.popitem(last=False)
+
+    def pop(self, *keys: str):
+        self.generation += 1
+        for key in keys:
+            self.entries.pop(key, None)
+
+    def clear(self):
+        self.generation += 1
+        self.entries.clear()
@@ -1,15 +1,17 @@
-from fastapi import Depends, Request, status
+from fastapi import Depends, Header, Query, Request, status
 from fastapi.security import HTTPBearer
 from fastapi.security.http import HTTPAuthorizationCredentials
 from sqlmodel.ext.asyncio.session import AsyncSession
-from typing import Literal
+from typing import Callable, Literal, Optional
+import secrets
 
 from src.lib.response import ErrorResponse
-from src.lib.utils import decode_jwt_token
+from src.lib.utils import decode_jwt_token, decode_cursor
 from src.db.redis import redis_set_json, redis_get_json, redis_get_string
-from src.db.main import get_session
+from src.db.main import get_session, primary_session
 from src.auth.services import UserService
 from src.auth.schemas import UserModel
+from src.config import Config
 
 
 user_service = UserService()
@@ -36,7 +38,7 @@ class TokenBearer(HTTPBearer):
             return None
         
         if self.token_type == "access":
-            stored_token = await redis_get_string(f"refresh:{token_data["uid"]}")
+            stored_token = await redis_get_string(f"refresh:{token_data["uid"]}", cached=True)
 
             if stored_token is None:
                 raise ErrorResponse(status=status.HTTP_401_UNAUTHORIZED, message="Invalid access token!")
@@ -54,14 +56,49 @@ access_token_bearer = TokenBearer(token_type="access")
 refresh_token_bearer = TokenBearer(token_type="refresh")
 
 
-async def get_current_user(token_data: dict = Depends(access_token_bearer), session: AsyncSession = Depends(get_session)):
-    cache_data = await redis_get_json(f"user:{token_data["uid"]}")
+def current_user_dependency(intent: Literal["read", "write"]) -> Callable:
+    async def current_user(token_data: dict = Depends(access_token_bearer), session: AsyncSession = Depends(get_session(intent))):
+        cache_data = await redis_get_json(f"user:{token_data["uid"]}", cached=True)
+
+        if cache_data is not None:
+            return cache_data
+
+        # The payload is cached for every worker, so it is never loaded from a lagging replica
+        async with primary_session(session) as primary:
+            query_data = await user_service.get_user_by_id(token_data["uid"], primary)
+        user_data = UserModel.model_validate(query_data, from_attributes=True).model_dump(mode="json")
+        user_data_result = await redis_set_json(f"user:{token_data["uid"]}", user_data)
+
+        return user_data if user_data_result else None
+
+    return current_user
+
+
+current_user_dependencies = {intent: current_user_dependency(intent) for intent in ("read", "write")}
+
+
+def get_current_user(intent: Literal["read", "write"] = "read") -> Callable:
+    """Current user dependency on the session of the route's intent, so the route shares that session."""
+    return current_user_dependencies[intent]
+
+
+def import_token_guard(x_import_token: Optional[str] = Header(default=None)):
+    """Bulk imports are for internal callers holding SIGNUP_IMPORT_TOKEN, they are disabled without one."""
+    if not Config.SIGNUP_IMPORT_TOKEN:
+        raise ErrorResponse(status=status.HTTP_403_FORBIDDEN, message="Batch signup is disabled!")
+
+    if x_import_token is None or not secrets.compare_digest(x_import_token, Config.SIGNUP_IMPORT_TOKEN):
+        raise ErrorResponse(status=status.HTTP_403_FORBIDDEN, message="Invalid import token!")
+
+
+def get_page_params(
+    limit: int = Query(default=Config.PAGE_SIZE, ge=1, le=Config.MAX_PAGE_SIZE), cursor: Optional[str] = None
+) -> tuple[int, tuple | None]:
+    if cursor is None:
+        return limit, None
 
-    if cache_data is not None:
-        return cache_data
-    
-    query_data = await user_service.get_user_by_id(token_data["uid"], session)
-    user_data = UserModel.model_validate(query_data, from_attributes=True).model_dump(mode="json")
-    user_data_result = await redis_set_json(f"user:{token_data["uid"]}", user_data)
+    after = decode_cursor(cursor)
 
-    return user_data if user_data_result else None
+    if after is None:
+        raise ErrorResponse(status=status.HTTP_400_BAD_REQUEST, message="Invalid cursor!")
+    return limit, after
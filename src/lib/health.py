@@ -0,0 +1,112 @@
+from typing import Awaitable, Callable
+from functools import partial
+import asyncio
+import logging
+import time
+
+from src.db.main import ping_db, get_pool_stats, get_replica_pool_stats, replica_router
+from src.db.redis import redis_client
+from src.lib.snowflake import snowflake
+from src.config import Config
+
+
+logger = logging.getLogger("bookly.health")
+
+# Last result of each dependency probe, refreshed in the background so /readyz does no I/O
+probes: dict[str, dict] = {}
+
+
+async def run_probe(name: str, check: Callable[[], Awaitable]):
+    start_time = time.perf_counter()
+    try:
+        await asyncio.wait_for(check(), timeout=Config.HEALTH_PROBE_TIMEOUT)
+        error = None
+    except Exception as e:
+        error = f"{type(e).__name__}: {e}" if str(e) else type(e).__name__
+
+    if error and (probes.get(name) or {}).get("ok", True):
+        logger.warning("%s probe failed: %s", name.capitalize(), error)
+
+    probes[name] = {
+        "ok": error is None,
+        "latency_ms": round((time.perf_counter() - start_time) * 1000, 2),
+        "error": error,
+        "checked_at": time.monotonic(),
+    }
+
+
+def replica_probe_names() -> list[str]:
+    return [f"replica_{index}" for index in range(len(replica_router.engines))] if replica_router else []
+
+
+async def refresh_probes():
+    replicas = replica_router.engines if replica_router else []
+    await asyncio.gather(
+        run_probe("database", ping_db),
+        run_probe("redis", redis_client.ping),
+        *(run_probe(name, partial(ping_db, engine)) for name, engine in zip(replica_probe_names(), replicas)),
+    )
+
+    # Reads skip a replica that failed its probe, instead of waiting for a request to fail connecting
+    for index, name in enumerate(replica_probe_names()):
+        if not probes[name]["ok"]:
+            replica_router.mark_down(index)
+
+
+async def run_health_probes():
+    """Probe the database and Redis every HEALTH_PROBE_INTERVAL seconds, until cancelled."""
+    try:
+        while True:
+            await refresh_probes()
+            await asyncio.sleep(Config.HEALTH_PROBE_INTERVAL)
+    finally:
+        # Not ready while the worker shuts down, so load balancers drain it
+        probes.clear()
+
+
+def get_pool_saturation() -> dict:
+    """Share of each pool's connection limit that is checked out."""
+    redis_pool = redis_client.connection_pool
+    db_pools = {"database": get_pool_stats(), **dict(zip(replica_probe_names(), get_replica_pool_stats()))}
+    saturation = {"redis": round(len(redis_pool._in_use_connections) / redis_pool.max_connections, 3)}
+
+    for name, db_pool in db_pools.items():
+        db_limit = db_pool["size"] + max(db_pool["max_overflow"], 0)
+        saturation[name] = round(db_pool["checked_out"] / db_limit, 3) if db_limit else 0.0
+    return saturation
+
+
+def get_readiness() -> tuple[bool, dict]:
+    """Ready when both probes passed recently, neither pool is saturated and the snowflake shard lease holds.
+
+    Replicas are reported but don't decide readiness, reads fall back to the primary without them.
+    """
+    now = time.monotonic()
+    stale_after = Config.HEALTH_PROBE_INTERVAL * 3
+    saturation = get_pool_saturation()
+    checks = {}
+
+    for name in ("database", "redis", *replica_probe_names()):
+        probe = probes.get(name)
+
+        if probe is None:
+            checks[name] = {"ok": False, "error": "Not probed yet", "saturation": saturation[name]}
+            continue
+
+        error = probe["error"] if now - probe["checked_at"] <= stale_after else "Probe result is stale"
+        if error is None and saturation[name] >= Config.HEALTH_MAX_SATURATION:
+            error = "Pool is saturated"
+
+        checks[name] = {
+            "ok": error is None,
+            "error": error,
+            "latency_ms": probe["latency_ms"],
+            "age_seconds": round(now - probe["checked_at"], 3),
+            "saturation": saturation[name],
+        }
+
+    if snowflake.lease_until is not None:
+        lapsed = snowflake.lease_lapsed()
+        checks["snowflake"] = {"ok": not lapsed, "error": "Shard lease lapsed" if lapsed else None, "shard_id": snowflake.shard_id}
+
+    return all(checks[name]["ok"] for name in ("database", "redis", "snowflake") if name in checks), checks
@@ -0,0 +1,61 @@
+from logging.handlers import QueueHandler, QueueListener
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from pydantic_core import to_json
+import logging
+import queue
+import sys
+
+from src.config import Config
+
+
+request_id_var: ContextVar[str | None] = ContextVar("request_id", default=None)
+
+# LogRecord attributes that are not user supplied extras
+RECORD_FIELDS = set(vars(logging.makeLogRecord({}))) | {"message", "request_id"}
+
+access_logger = logging.getLogger("bookly.access")
+
+
+class JsonFormatter(logging.Formatter):
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "time": datetime.fromtimestamp(record.created, timezone.utc).isoformat(),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+
+        if (request_id := getattr(record, "request_id", None)) is not None:
+            entry["request_id"] = request_id
+
+        entry.update((key, value) for key, value in vars(record).items() if key not in RECORD_FIELDS)
+
+        if record.exc_info:
+            entry["exception"] = self.formatException(record.exc_info)
+        return to_json(entry, fallback=str).decode()
+
+
+class ContextQueueHandler(QueueHandler):
+    """Capture request context on the event loop, leave formatting to the listener thread."""
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        record.msg = record.getMessage()
+        record.args = None
+        record.request_id = request_id_var.get()
+        return record
+
+
+def setup_logging() -> QueueListener:
+    """Route all records through a queue to a JSON stdout handler, start the listener in the lifespan."""
+    log_queue = queue.SimpleQueue()
+
+    stream_handler = logging.StreamHandler(sys.stdout)
+    stream_handler.setFormatter(JsonFormatter())
+
+    root_logger = logging.getLogger()
+    root_logger.handlers[:] = [ContextQueueHandler(log_queue)]
+    root_logger.setLevel(Config.LOG_LEVEL)
+    access_logger.setLevel(Config.LOG_ACCESS_LEVEL)
+
+    return QueueListener(log_queue, stream_handler, respect_handler_level=True)
@@ -0,0 +1,96 @@
+from prometheus_client import Counter, Gauge, Histogram, CollectorRegistry, REGISTRY, CONTENT_TYPE_LATEST, generate_latest, multiprocess
+from prometheus_client.core import CounterMetricFamily, GaugeMetricFamily
+from prometheus_client.registry import Collector
+import os
+
+
+http_requests = Counter("http_requests_total", "HTTP requests handled.", ["method", "route", "status"])
+http_request_duration = Histogram("http_request_duration_seconds", "HTTP request latency.", ["method", "route"])
+http_requests_in_progress = Gauge("http_requests_in_progress", "HTTP requests being handled.", ["method"], multiprocess_mode="livesum")
+
+password_operations = Counter("password_operations_total", "bcrypt password operations.", ["operation"])
+jwt_operations = Counter("jwt_operations_total", "JWT operations.", ["operation", "result"])
+startup_seconds = Gauge("app_startup_seconds", "Worker cold start time by phase.", ["phase"], multiprocess_mode="all")
+
+# Bound children, so the hot path skips the labels() lookup and lock
+PASSWORD_HASHES = password_operations.labels("hash")
+PASSWORD_VERIFIES = password_operations.labels("verify")
+JWT_ENCODES = jwt_operations.labels("encode", "ok")
+JWT_DECODES = jwt_operations.labels("decode", "ok")
+JWT_DECODES_CACHED = jwt_operations.labels("decode", "cached")
+JWT_DECODES_EXPIRED = jwt_operations.labels("decode", "expired")
+JWT_DECODES_INVALID = jwt_operations.labels("decode", "invalid")
+
+# Label children by method, (method, route) and (method, route, status)
+progress_children: dict[str, Gauge] = {}
+duration_children: dict[tuple, Histogram] = {}
+status_children: dict[tuple, Counter] = {}
+
+
+class PoolCollector(Collector):
+    """Read DB and Redis pool state at scrape time, so nothing is recorded per checkout."""
+
+    def describe(self):
+        # Keeps register() from calling collect(), which would import the engine at import time
+        return []
+
+    def collect(self):
+        from src.db.main import get_pool_stats, get_replica_pool_stats
+        from src.db.redis import redis_client
+
+        db_pool = get_pool_stats()
+        for name in ("size", "checked_in", "checked_out", "overflow", "max_overflow"):
+            yield GaugeMetricFamily(f"db_pool_{name}", f"DB connection pool {name.replace('_', ' ')}.", value=db_pool[name])
+
+        yield CounterMetricFamily("db_pool_waits", "DB connection checkouts that waited.", value=db_pool["waits"])
+        yield CounterMetricFamily("db_pool_wait_seconds", "Total time DB connection checkouts waited.", value=db_pool["wait_total"])
+        yield GaugeMetricFamily("db_pool_wait_max_seconds", "Longest DB connection checkout wait.", value=db_pool["wait_max"])
+
+        replica_pools = get_replica_pool_stats()
+        for name in ("size", "checked_in", "checked_out", "overflow", "max_overflow", "down"):
+            family = GaugeMetricFamily(f"db_replica_pool_{name}", f"Read replica connection pool {name.replace('_', ' ')}.", labels=["replica"])
+            for index, replica_pool in enumerate(replica_pools):
+                family.add_metric([str(index)], replica_pool[name])
+            yield family
+
+        redis_pool = redis_client.connection_pool
+        yield GaugeMetricFamily("redis_pool_in_use", "Redis connections in use.", value=len(redis_pool._in_use_connections))
+        yield GaugeMetricFamily("redis_pool_available", "Idle Redis connections.", value=len(redis_pool._available_connections))
+        yield GaugeMetricFamily("redis_pool_max", "Redis connection pool limit.", value=redis_pool.max_connections)
+
+
+REGISTRY.register(PoolCollector())
+
+
+def render_metrics() -> tuple[bytes, str]:
+    """With several workers set PROMETHEUS_MULTIPROC_DIR, so any worker reports the totals of all of them.
+
+    Pool gauges describe a single worker's pools and are left out in that mode.
+    """
+    if "PROMETHEUS_MULTIPROC_DIR" not in os.environ:
+        return generate_latest(REGISTRY), CONTENT_TYPE_LATEST
+
+    registry = CollectorRegistry()
+    multiprocess.MultiProcessCollector(registry)
+    return generate_latest(registry), CONTENT_TYPE_LATEST
+
+
+def request_started(method: str) -> Gauge:
+    if (in_progress := progress_children.get(method)) is None:
+        in_progress = progress_children[method] = http_requests_in_progress.labels(method)
+    in_progress.inc()
+    return in_progress
+
+
+def request_finished(in_progress: Gauge, method: str, template: str, status_code: int, duration: float):
+    in_progress.dec()
+
+    key = (method, template)
+    if (histogram := duration_children.get(key)) is None:
+        histogram = duration_children[key] = http_request_duration.labels(method, template)
+    histogram.observe(duration)
+
+    key = (method, template, status_code)
+    if (counter := status_children.get(key)) is None:
+        counter = status_children[key] = http_requests.labels(method, template, str(status_code))
+    counter.inc()
@@ -1,32 +1,99 @@
 from fastapi import FastAPI
-from fastapi.requests import Request
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.middleware.trustedhost import TrustedHostMiddleware
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
 import time
 import logging
+import random
+import uuid
+
+from src.lib.metrics import request_started, request_finished
+from src.lib.logger import access_logger, request_id_var
+from src.config import Config
 
 
 logger = logging.getLogger("uvicorn.access")
 logger.disabled = True
 
 
-def register_middlewares(app: FastAPI):
-    # Custom logging middleware
-    @app.middleware("http")
-    async def custom_logging(request: Request, call_next):
-        start_time = time.time()
-        response = await call_next(request)
-        end_time = round(time.time() - start_time, 4)
-        
-        host = request.client.host
-        port = request.client.port
-        method = request.method
-        path = request.url.path
-        code = response.status_code
-
-        print(f"{host}:{port} - {method} - {path} - {code} completed after {end_time}sec")
-        return response
+class RequestMiddleware:
+    """Request id, access log and metrics in one pure ASGI layer, so they share one send wrapper and clock."""
+
+    def __init__(self, app: ASGIApp, sample_rate: float = 1.0):
+        self.app = app
+        self.sample_rate = sample_rate
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        request_id = None
+        for name, value in scope["headers"]:
+            if name == b"x-request-id":
+                request_id = value[:64].decode("latin-1")
+                break
+
+        request_id = request_id or uuid.uuid4().hex
+        request_id_header = (b"x-request-id", request_id.encode("latin-1"))
+        request_id_token = request_id_var.set(request_id)
+
+        method = scope["method"]
+        status_code = None
+        in_progress = request_started(method)
+        start_time = time.perf_counter()
+
+        async def send_wrapper(message: Message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                message["headers"] = [*message.get("headers", ()), request_id_header]
+                self.log(scope, status_code, time.perf_counter() - start_time)
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        except Exception:
+            if status_code is None:
+                status_code = 500
+                self.log(scope, status_code, time.perf_counter() - start_time)
+            raise
+        finally:
+            # Set by the router once matched, unmatched paths share one label to bound cardinality
+            template = getattr(scope.get("route"), "path", "unmatched")
+            request_finished(in_progress, method, template, status_code or 500, time.perf_counter() - start_time)
+            request_id_var.reset(request_id_token)
+
+    def log(self, scope: Scope, code: int, duration: float):
+        level = logging.ERROR if code >= 500 else logging.WARNING if code >= 400 else logging.INFO
 
+        # Successful requests are sampled, failures are always logged
+        if not access_logger.isEnabledFor(level) or (level == logging.INFO and random.random() >= self.sample_rate):
+            return
+
+        client = scope.get("client")
+        access_logger.log(level, "request handled", extra={
+            "client": f"{client[0]}:{client[1]}" if client else None,
+            "method": scope["method"],
+            "path": scope["path"],
+            "status": code,
+            "duration_ms": round(duration * 1000, 3),
+        })
+
+
+class ProbeTrustedHostMiddleware(TrustedHostMiddleware):
+    """Host header check that lets liveness and readiness probes through, they are sent with the pod or host IP."""
+
+    def __init__(self, app: ASGIApp, probe_paths: tuple[str, ...] = (), **kwargs):
+        super().__init__(app, **kwargs)
+        self.probe_paths = probe_paths
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] == "http" and scope["path"] in self.probe_paths:
+            return await self.app(scope, receive, send)
+        await super().__call__(scope, receive, send)
+
+
+def register_middlewares(app: FastAPI):
     app.add_middleware(
         CORSMiddleware,
         allow_origins=["*"],
@@ -36,6 +103,10 @@ def register_middlewares(app: FastAPI):
     )
 
     app.add_middleware(
-        TrustedHostMiddleware,
+        ProbeTrustedHostMiddleware,
+        probe_paths=("/healthz", "/readyz"),
         allowed_hosts=[".vercel.app", ".onrender.com", "localhost", "127.0.0.1" ,"0.0.0.0"],
     )
+
+    # Outermost, so it also times the middlewares above
+    app.add_middleware(RequestMiddleware, sample_rate=Config.LOG_ACCESS_SAMPLE_RATE)
@@ -1,5 +1,6 @@
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, Response
 from pydantic import BaseModel
+from pydantic_core import to_json
 from typing import Optional, Any
 
 
@@ -8,15 +9,39 @@ class ResponseModel(BaseModel):
     message: str
     data: Optional[Any] = None
     error: Optional[Any] = None
+    next_cursor: Optional[str] = None
 
     class Config:
         json_encoders = {type(None): lambda v: None}
 
 
-class SuccessResponse(JSONResponse):
-    def __init__(self, status: int, message: str, data: Any = None):
-        content = ResponseModel(success=True, message=message, data=data)
-        super().__init__(status_code=status, content=content.model_dump(exclude_none=True))
+class FastJSONResponse(JSONResponse):
+    """JSON response rendered by pydantic-core, pydantic models in content are serialized in the same pass."""
+
+    def render(self, content: Any) -> bytes:
+        return to_json(content)
+
+
+class SuccessResponse(FastJSONResponse):
+    def __init__(self, status: int, message: str, data: Any = None, next_cursor: Optional[str] = None):
+        content = {"success": True, "message": message}
+
+        if data is not None:
+            content["data"] = data
+        if next_cursor is not None:
+            content["next_cursor"] = next_cursor
+
+        super().__init__(status_code=status, content=content)
+
+
+class CachedSuccessResponse(Response):
+    """Success envelope around a data payload that is already serialized json."""
+
+    media_type = "application/json"
+
+    def __init__(self, status: int, message: str, data: str):
+        body = b'{"success":true,"message":' + to_json(message) + b',"data":' + data.encode() + b"}"
+        super().__init__(status_code=status, content=body)
 
 
 class ErrorResponse(Exception):
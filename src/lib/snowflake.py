@@ -0,0 +1,176 @@
+from redis.exceptions import RedisError
+from typing import List
+import asyncio
+import logging
+import random
+import threading
+import time
+import uuid
+
+from src.config import Config
+
+
+EPOCH = 1314220021721  # Custom epoch (same as in your SQL)
+SHARD_BITS = 13
+SEQUENCE_BITS = 10
+MAX_SHARD_ID = (1 << SHARD_BITS) - 1
+SEQUENCE_MASK = (1 << SEQUENCE_BITS) - 1
+
+# Warn once the id clock runs this far ahead of the wall clock
+DRIFT_WARNING_MS = 1000
+
+SHARD_LEASE_KEY = "snowflake:shard:{}"
+
+# Seconds the local lease deadline keeps from the Redis key's expiry
+LEASE_MARGIN = 1.0
+
+# Renew the lease we hold, or take it back if it lapsed and nobody else claimed it
+RENEW_LEASE_SCRIPT = """
+local owner = redis.call('get', KEYS[1])
+if owner == ARGV[1] or not owner then
+    redis.call('set', KEYS[1], ARGV[1], 'EX', ARGV[2])
+    return 1
+end
+return 0
+"""
+
+RELEASE_LEASE_SCRIPT = """
+if redis.call('get', KEYS[1]) == ARGV[1] then
+    return redis.call('del', KEYS[1])
+end
+return 0
+"""
+
+logger = logging.getLogger("bookly.snowflake")
+
+
+class Snowflake:
+    """Snowflake ids: 41 bits of milliseconds since EPOCH, 13 bits of shard and 10 bits of sequence.
+
+    The last issued (millisecond, sequence) pair is kept as one integer, so reserving ids is an
+    addition. When a millisecond's sequence runs out, or the wall clock steps back, ids borrow
+    the following milliseconds instead of spinning, and stay unique and increasing.
+    """
+
+    def __init__(self, shard_id: int):
+        self.set_shard_id(shard_id)
+        self.last = 0
+        self.lock = threading.Lock()
+        self.drifting = False
+        # Monotonic time the leased shard id may be claimed by another process, None when not leased
+        self.lease_until: float | None = None
+
+    def set_shard_id(self, shard_id: int):
+        if not 0 <= shard_id <= MAX_SHARD_ID:
+            raise ValueError(f"Shard id must be between 0 and {MAX_SHARD_ID}!")
+        self.shard_id = shard_id
+        self.shard_bits = shard_id << SEQUENCE_BITS
+
+    def lease_lapsed(self) -> bool:
+        return self.lease_until is not None and time.monotonic() > self.lease_until
+
+    def check_lease(self):
+        if self.lease_lapsed():
+            raise RuntimeError(f"Snowflake shard {self.shard_id} lease lapsed, ids could collide with its new owner!")
+
+    def check_drift(self, ahead: int):
+        drifting = ahead > DRIFT_WARNING_MS << SEQUENCE_BITS
+        if drifting != self.drifting:
+            self.drifting = drifting
+            if drifting:
+                logger.warning("Snowflake clock is more than %sms ahead of the wall clock, it may have stepped back!", DRIFT_WARNING_MS)
+
+    def reserve(self, count: int) -> int:
+        """Reserve count consecutive (millisecond, sequence) slots, returns the first."""
+        self.check_lease()
+        now = (time.time_ns() // 1_000_000) << SEQUENCE_BITS
+
+        with self.lock:
+            start = self.last + 1
+            if start < now:
+                start = now
+            self.last = start + count - 1
+
+        if start > now or self.drifting:
+            self.check_drift(start - now)
+        return start
+
+    def next_id(self) -> int:
+        if self.lease_until is not None:
+            self.check_lease()
+        now = (time.time_ns() // 1_000_000) << SEQUENCE_BITS
+
+        with self.lock:
+            slot = self.last + 1
+            if slot < now:
+                slot = now
+            self.last = slot
+
+        if slot > now or self.drifting:
+            self.check_drift(slot - now)
+        return (((slot >> SEQUENCE_BITS) - EPOCH) << (SHARD_BITS + SEQUENCE_BITS)) | self.shard_bits | (slot & SEQUENCE_MASK)
+
+    def next_ids(self, count: int) -> List[int]:
+        start = self.reserve(count)
+        shard_bits = self.shard_bits
+        return [
+            (((slot >> SEQUENCE_BITS) - EPOCH) << (SHARD_BITS + SEQUENCE_BITS)) | shard_bits | (slot & SEQUENCE_MASK)
+            for slot in range(start, start + count)
+        ]
+
+
+snowflake = Snowflake(Config.SNOWFLAKE_SHARD_ID)
+lease_token = uuid.uuid4().hex
+
+
+def generate_id() -> int:
+    """Generate unique id according to current time stamp."""
+    return snowflake.next_id()
+
+
+def generate_ids(count: int) -> List[int]:
+    """Reserve count unique ids at once, for bulk inserts."""
+    return snowflake.next_ids(count) if count > 0 else []
+
+
+async def acquire_shard_lease(redis) -> int:
+    """Claim a free shard id in Redis for this process, starting from a random one."""
+    start = random.randrange(MAX_SHARD_ID + 1)
+
+    for offset in range(MAX_SHARD_ID + 1):
+        shard_id = (start + offset) % (MAX_SHARD_ID + 1)
+        started = time.monotonic()
+
+        if await redis.set(SHARD_LEASE_KEY.format(shard_id), lease_token, nx=True, ex=Config.SNOWFLAKE_LEASE_TTL):
+            snowflake.set_shard_id(shard_id)
+            snowflake.lease_until = started + Config.SNOWFLAKE_LEASE_TTL - LEASE_MARGIN
+            return shard_id
+
+    raise RuntimeError("No free snowflake shard id!")
+
+
+async def hold_shard_lease(redis):
+    """Renew the shard lease until cancelled, moving to a new shard if another process took it.
+
+    Ids stop being issued once the lease lapses without a renewal, until a shard is leased again.
+    """
+    while True:
+        await asyncio.sleep(Config.SNOWFLAKE_LEASE_TTL / 3)
+
+        try:
+            started = time.monotonic()
+            renewed = await redis.eval(RENEW_LEASE_SCRIPT, 1, SHARD_LEASE_KEY.format(snowflake.shard_id), lease_token, Config.SNOWFLAKE_LEASE_TTL)
+
+            if renewed:
+                snowflake.lease_until = started + Config.SNOWFLAKE_LEASE_TTL - LEASE_MARGIN
+            else:
+                snowflake.lease_until = 0.0
+                logger.warning("Snowflake shard %s was claimed by another process, acquiring a new one!", snowflake.shard_id)
+                await acquire_shard_lease(redis)
+        except (RedisError, RuntimeError) as e:
+            logger.warning("Snowflake shard lease renewal error: %s", e)
+
+
+async def release_shard_lease(redis):
+    snowflake.lease_until = 0.0
+    await redis.eval(RELEASE_LEASE_SCRIPT, 1, SHARD_LEASE_KEY.format(snowflake.shard_id), lease_token)
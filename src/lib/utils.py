@@ -1,58 +1,20 @@
 from datetime import datetime, timezone, timedelta
-from itsdangerous import URLSafeTimedSerializer
-from passlib.context import CryptContext
-from jose import jwt, JWTError, ExpiredSignatureError
-from typing import Literal
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Literal
+import asyncio
+import base64
+import functools
+import hashlib
 import logging
 import random
 import string
-import threading
 import time
 import uuid
 
 from src.config import Config
-
-
-# Constants
-EPOCH = 1314220021721  # Custom epoch (same as in your SQL)
-SHARD_ID = 1           # Can be set differently per server
-SEQUENCE_MASK = 1023   # 10 bits = 1024 values max
-
-# Globals
-last_timestamp = -1
-sequence = 0
-lock = threading.Lock()
-
-
-def current_millis():
-    return int(time.time() * 1000)
-
-
-def wait_next_millis(last_ts):
-    ts = current_millis()
-    while ts <= last_ts:
-        ts = current_millis()
-    return ts
-
-
-def generate_id():
-    """Generate unique id according to current time stamp."""
-    global last_timestamp, sequence
-
-    with lock:
-        now_ms = current_millis()
-        
-        if now_ms == last_timestamp:
-            sequence = (sequence + 1) & SEQUENCE_MASK
-            if sequence == 0:
-                now_ms = wait_next_millis(last_timestamp)
-        else:
-            sequence = 0
-
-        last_timestamp = now_ms
-
-        id_val = ((now_ms - EPOCH) << 23) | (SHARD_ID << 10) | sequence
-        return id_val
+from src.lib.metrics import PASSWORD_HASHES, PASSWORD_VERIFIES, JWT_ENCODES, JWT_DECODES, JWT_DECODES_CACHED, JWT_DECODES_EXPIRED, JWT_DECODES_INVALID
+from src.lib.cache import LocalCache
+from src.lib.snowflake import generate_id, generate_ids
 
 
 def generate_suffix(length: int = 6) -> str:
@@ -60,6 +22,17 @@ def generate_suffix(length: int = 6) -> str:
     return ''.join(random.choices(string.ascii_lowercase + string.digits, k=length))
 
 
+def to_base36(value: int) -> str:
+    """Encode non-negative integer in base36."""
+    digits = string.digits + string.ascii_lowercase
+    encoded = ""
+    while True:
+        value, remainder = divmod(value, 36)
+        encoded = digits[remainder] + encoded
+        if value == 0:
+            return encoded
+
+
 def get_timestamp():
     """Get current timestamp with utc timezone."""
     return datetime.now(timezone.utc)
@@ -70,60 +43,130 @@ def generate_uuid():
     return str(uuid.uuid4())
 
 
-passwd_context = CryptContext(schemes=["bcrypt"])
+@functools.cache
+def get_passwd_context():
+    """Password hashing context, passlib is imported on first use to keep worker start fast."""
+    from passlib.context import CryptContext
 
+    return CryptContext(schemes=["bcrypt"], bcrypt__rounds=Config.BCRYPT_ROUNDS)
 
-def generate_passwd_hash(password: str) -> str:
+
+# bcrypt releases the GIL, so a small thread pool hashes in parallel without blocking the event loop
+passwd_executor = ThreadPoolExecutor(max_workers=Config.BCRYPT_WORKERS, thread_name_prefix="bcrypt")
+
+
+async def generate_passwd_hash(password: str) -> str:
     """Generate hash from password."""
-    return passwd_context.hash(password)
+    PASSWORD_HASHES.inc()
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(passwd_executor, get_passwd_context().hash, password)
 
 
-def verify_password(password: str, hashed: str) -> bool:
+async def verify_password(password: str, hashed: str) -> bool:
     """Verify password by hash."""
-    return passwd_context.verify(password, hashed)
+    PASSWORD_VERIFIES.inc()
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(passwd_executor, get_passwd_context().verify, password, hashed)
+
+
+def load_jwt_backend(name: Literal["jose", "pyjwt"]) -> tuple[Callable[[dict], str], Callable[[str], dict], type, type]:
+    """Return encode, decode and the expired and invalid token errors of a JWT library."""
+    if name == "pyjwt":
+        import jwt
+
+        return (
+            lambda claims: jwt.encode(claims, Config.JWT_SECRET, algorithm=Config.JWT_ALGORITHM),
+            # jose never rejects an iat ahead of the clock, so clock skew between replicas can't fail fresh tokens
+            lambda token: jwt.decode(token, Config.JWT_SECRET, algorithms=[Config.JWT_ALGORITHM], options={"verify_iat": False}),
+            jwt.ExpiredSignatureError,
+            jwt.InvalidTokenError,
+        )
+
+    from jose import jwt, JWTError, ExpiredSignatureError
+
+    return (
+        lambda claims: jwt.encode(claims=claims, key=Config.JWT_SECRET, algorithm=Config.JWT_ALGORITHM),
+        lambda token: jwt.decode(token=token, key=Config.JWT_SECRET, algorithms=Config.JWT_ALGORITHM, options={"verify_exp": True}),
+        ExpiredSignatureError,
+        JWTError,
+    )
+
+
+jwt_encode, jwt_decode, JWTExpiredError, JWTInvalidError = load_jwt_backend(Config.JWT_BACKEND)
+
+# Verified claims by token digest, each entry expires with its token
+jwt_claims_cache = LocalCache(maxsize=Config.JWT_CACHE_SIZE, ttl=0)
 
 
 def encode_jwt_token(user_id: int, token_type: Literal["access", "refresh"]):
     """Encode JWT token."""
     expiration = Config.ACCESS_EXPIRY if token_type == "access" else Config.REFRESH_EXPIRY
+    JWT_ENCODES.inc()
     payload = {"type": token_type, "uid": user_id, "iat": get_timestamp(), "exp": get_timestamp() + timedelta(seconds=expiration)}
-    return jwt.encode(claims=payload, key=Config.JWT_SECRET, algorithm=Config.JWT_ALGORITHM)
+    return jwt_encode(payload)
 
 
 def decode_jwt_token(jwt_token: str):
-    """Decode JWT token."""
+    """Decode JWT token, verified claims are served from cache until the token expires."""
+    digest = hashlib.blake2b(jwt_token.encode(), digest_size=16).digest()
+
+    if (cached_token := jwt_claims_cache.get(digest)) is not None:
+        JWT_DECODES_CACHED.inc()
+        return cached_token
+
     try:
-        decoded_token = jwt.decode(
-            token=jwt_token, 
-            key=Config.JWT_SECRET, 
-            algorithms=Config.JWT_ALGORITHM, 
-            options={"verify_exp": True}
-        )
-        return decoded_token
-    except ExpiredSignatureError:
-        logging.warning("Token has expired!")
+        decoded_token = jwt_decode(jwt_token)
+    except JWTExpiredError:
+        JWT_DECODES_EXPIRED.inc()
         return None
-    except JWTError as e:
-        logging.exception("Token decoding error!", str(e))
+    except JWTInvalidError:
+        # Expected for bad input, so no traceback is formatted or logged
+        JWT_DECODES_INVALID.inc()
         return None
 
+    JWT_DECODES.inc()
+
+    if (ttl := decoded_token.get("exp", 0) - time.time()) > 0:
+        jwt_claims_cache.set(digest, decoded_token, ttl=ttl)
+    return decoded_token
 
-serializer = URLSafeTimedSerializer(secret_key=Config.JWT_SECRET, salt="email-configuration")
+
+@functools.cache
+def get_serializer():
+    from itsdangerous import URLSafeTimedSerializer
+
+    return URLSafeTimedSerializer(secret_key=Config.JWT_SECRET, salt="email-configuration")
 
 
 def create_url_safe_token(data: dict):
     """Create URL safe token."""
-    return serializer.dumps(data)
+    return get_serializer().dumps(data)
 
 
 def decode_url_safe_token(token: str):
     """Decode URL safe token."""
     try:
-        return serializer.loads(token)
+        return get_serializer().loads(token)
     except Exception as e:
         logging.error(str(e))
         return None        
     
 
+def encode_cursor(key: datetime | float, id: int) -> str:
+    """Encode keyset position into opaque cursor."""
+    raw = f"f|{key!r}|{id}" if isinstance(key, float) else f"t|{key.isoformat()}|{id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> tuple[datetime | float, int] | None:
+    """Decode opaque cursor into keyset position."""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+        kind, key, id = raw.split("|")
+        return (float(key) if kind == "f" else datetime.fromisoformat(key)), int(id)
+    except (ValueError, UnicodeDecodeError):
+        return None
+
+
 def has_empty_field(fields: dict) -> bool:
     return any(value in ("", None) for value in fields.values())
@@ -30,8 +30,10 @@ class ReviewService:
         review_data_dict["user_id"] = current_user.id
         review_data_dict["book_id"] = current_book.id
 
-        new_review = Review(**review_data_dict, book=current_book, user=current_user)
+        new_review = Review(**review_data_dict)
         session.add(new_review)
+        await book_service.update_rating_stats(book_id, session, added=new_review.rating)
         await session.commit()
+        await book_service.invalidate_cache(book_id)
 
         return new_review
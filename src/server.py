@@ -0,0 +1,73 @@
+"""Server entrypoint, `python main.py` runs the app with the server and presets from Settings.
+
+Each worker is a separate process that imports the app, so the DB and Redis pools
+are per worker. Use DB_MAX_CONNECTIONS to cap the total across all workers.
+"""
+from src.config import Config
+import os
+
+
+APP_TARGET = "src.app:app"
+
+
+def reset_metrics_dir():
+    """Empty PROMETHEUS_MULTIPROC_DIR before workers start, files of a previous run would add to the new totals."""
+    path = os.environ.get("PROMETHEUS_MULTIPROC_DIR")
+    if not path:
+        return
+
+    os.makedirs(path, exist_ok=True)
+    for name in os.listdir(path):
+        if name.endswith(".db"):
+            os.remove(os.path.join(path, name))
+
+
+def run_uvicorn(target: str = APP_TARGET):
+    import uvicorn
+
+    if Config.ENVIRONMENT == "development":
+        return uvicorn.run(target, host=Config.HOST, port=Config.PORT, reload=True)
+
+    uvicorn.run(
+        target,
+        host=Config.HOST,
+        port=Config.PORT,
+        workers=Config.WORKERS,
+        loop=Config.SERVER_LOOP,
+        http=Config.SERVER_HTTP,
+        backlog=Config.SERVER_BACKLOG,
+        timeout_keep_alive=Config.SERVER_KEEP_ALIVE,
+        timeout_graceful_shutdown=Config.SERVER_GRACEFUL_TIMEOUT,
+        # Requests are logged by RequestMiddleware, server logs propagate to the JSON root logger
+        access_log=False,
+        log_config=None,
+    )
+
+
+def run_granian(target: str = APP_TARGET):
+    from granian import Granian
+    from granian.constants import Interfaces, Loops
+    from granian.http import HTTP1Settings
+
+    Granian(
+        target,
+        address=Config.HOST,
+        port=Config.PORT,
+        interface=Interfaces.ASGI,
+        workers=Config.WORKERS,
+        loop=Loops(Config.SERVER_LOOP),
+        backlog=Config.SERVER_BACKLOG,
+        http1_settings=HTTP1Settings(keep_alive=Config.SERVER_KEEP_ALIVE > 0),
+        workers_kill_timeout=Config.SERVER_GRACEFUL_TIMEOUT,
+        respawn_failed_workers=True,
+        log_access=False,
+    ).serve()
+
+
+def run(target: str = APP_TARGET):
+    reset_metrics_dir()
+
+    if Config.SERVER == "granian":
+        run_granian(target)
+    else:
+        run_uvicorn(target)
@@ -1,4 +1,79 @@
-from fastapi import APIRouter
+from fastapi import APIRouter, Depends, Query, status
+from sqlmodel.ext.asyncio.session import AsyncSession
+from pydantic import TypeAdapter
+from typing import List, Literal
+
+from src.tags.schemas import TagModel, TagCountModel, TagAddModel
+from src.tags.services import TagService
+from src.books.routes import book_adapter
+from src.db.main import get_session
+from src.lib.response import SuccessResponse, ErrorResponse
+from src.lib.dependencies import access_token_bearer, get_page_params
+from src.lib.utils import encode_cursor
+from src.config import Config
 
 
 tag_router = APIRouter()
+tag_service = TagService()
+tag_adapter = TypeAdapter(List[TagModel])
+tag_count_adapter = TypeAdapter(List[TagCountModel])
+
+
+@tag_router.get("/")
+async def get_top_tags(
+    limit: int = Query(default=Config.PAGE_SIZE, ge=1, le=Config.MAX_PAGE_SIZE),
+    session: AsyncSession = Depends(get_session("read")),
+    _: dict = Depends(access_token_bearer),
+):
+    top_tags = await tag_service.get_top_tags(limit, session)
+    tags_data = tag_count_adapter.validate_python(top_tags, from_attributes=True)
+    return SuccessResponse(status=status.HTTP_200_OK, message="Tags fetched successfully!", data=tags_data)
+
+
+@tag_router.get("/books")
+async def get_books_by_tags(
+    tags: List[str] = Query(min_length=1, max_length=Config.TAG_BATCH_MAX),
+    match: Literal["any", "all"] = "any",
+    page: tuple = Depends(get_page_params),
+    session: AsyncSession = Depends(get_session("read")),
+    _: dict = Depends(access_token_bearer),
+):
+    names = [name.strip().lower() for name in tags]
+    tagged_books, next_key = await tag_service.get_books_by_tags(names, match, *page, session)
+    books_data = book_adapter.validate_python(tagged_books, from_attributes=True)
+    next_cursor = encode_cursor(*next_key) if next_key else None
+    return SuccessResponse(status=status.HTTP_200_OK, message="Books fetched successfully!", data=books_data, next_cursor=next_cursor)
+
+
+@tag_router.get("/book/{book_id}")
+async def get_book_tags(book_id: int, session: AsyncSession = Depends(get_session("read")), _: dict = Depends(access_token_bearer)):
+    book_tags = await tag_service.get_book_tags(book_id, session)
+    tags_data = tag_adapter.validate_python(book_tags, from_attributes=True)
+    return SuccessResponse(status=status.HTTP_200_OK, message="Tags fetched successfully!", data=tags_data)
+
+
+@tag_router.post("/book/{book_id}")
+async def add_tags_to_book(
+    book_id: int, tag_data: TagAddModel, session: AsyncSession = Depends(get_session("write")), token_data: dict = Depends(access_token_bearer)
+):
+    if len(tag_data.tags) > Config.TAG_BATCH_MAX:
+        raise ErrorResponse(status=status.HTTP_400_BAD_REQUEST, message=f"At most {Config.TAG_BATCH_MAX} tags per request!")
+
+    names = [tag.name for tag in tag_data.tags]
+    added_tags = await tag_service.add_tags_to_book(book_id, token_data["uid"], names, session)
+
+    if added_tags is None:
+        raise ErrorResponse(status=status.HTTP_404_NOT_FOUND, message="Book not found or You can't update!")
+
+    tags_data = tag_adapter.validate_python(added_tags, from_attributes=True)
+    return SuccessResponse(status=status.HTTP_201_CREATED, message="Tags added successfully!", data=tags_data)
+
+
+@tag_router.delete("/book/{book_id}/{tag_id}")
+async def remove_tag_from_book(book_id: int, tag_id: int, session: AsyncSession = Depends(get_session("write")), token_data: dict = Depends(access_token_bearer)):
+    tag_removed = await tag_service.remove_tag_from_book(book_id, tag_id, token_data["uid"], session)
+
+    if tag_removed:
+        return SuccessResponse(status=status.HTTP_200_OK, message="Tag removed successfully!")
+    else:
+        raise ErrorResponse(status=status.HTTP_404_NOT_FOUND, message="Tag not found or You can't remove!")
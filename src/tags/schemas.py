@@ -1,19 +1,32 @@
-import uuid
 from datetime import datetime
 from typing import List
 
-from pydantic import BaseModel
+from pydantic import BaseModel, Field, field_validator
 
 
 class TagModel(BaseModel):
-    id: uuid.UUID
+    id: str
     name: str
     created_at: datetime
 
+    @field_validator("id", mode="before")
+    @classmethod
+    def cast_id_to_str(cls, v):
+        return str(v)
+
+
+class TagCountModel(TagModel):
+    book_count: int
+
 
 class TagCreateModel(BaseModel):
-    name: str
+    name: str = Field(min_length=1, max_length=50)
+
+    @field_validator("name", mode="before")
+    @classmethod
+    def normalize_name(cls, v):
+        return v.strip().lower() if isinstance(v, str) else v
 
 
 class TagAddModel(BaseModel):
-    tags: List[TagCreateModel]
+    tags: List[TagCreateModel] = Field(min_length=1)
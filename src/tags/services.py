@@ -0,0 +1,83 @@
+from sqlmodel.ext.asyncio.session import AsyncSession
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlmodel import delete, desc, func, select
+from typing import List, Literal
+
+from src.lib.utils import generate_ids, get_timestamp
+from src.db.models import Book, BookTag, Tag
+from src.books.services import BookService
+
+
+class TagService:
+    @staticmethod
+    async def get_top_tags(limit: int, session: AsyncSession):
+        statement = select(Tag).where(Tag.book_count > 0).order_by(desc(Tag.book_count), desc(Tag.id)).limit(limit)
+        result = await session.exec(statement)
+        return result.all()
+
+    @staticmethod
+    async def get_book_tags(book_id: int, session: AsyncSession):
+        statement = select(Tag).join(BookTag, BookTag.tag_id == Tag.id).where(BookTag.book_id == book_id).order_by(Tag.name)
+        result = await session.exec(statement)
+        return result.all()
+
+    @staticmethod
+    async def upsert_tags(names: List[str], session: AsyncSession):
+        """Insert missing tag names and return every requested tag.
+
+        Existing tags are read by a follow-up SELECT instead of DO UPDATE, which would rewrite
+        and row-lock the most used tags on every add. Its new snapshot also sees tags that
+        concurrent inserts committed while this one waited on them.
+        """
+        timestamp = get_timestamp()
+        # Sorted so concurrent inserts take the name index entries in the same order
+        names = sorted(set(names))
+        rows = [{"id": tag_id, "name": name, "created_at": timestamp} for tag_id, name in zip(generate_ids(len(names)), names)]
+
+        statement = pg_insert(Tag).values(rows).on_conflict_do_nothing(index_elements=[Tag.name]).returning(Tag)
+        result = await session.exec(statement, execution_options={"populate_existing": True})
+        tags = result.scalars().all()
+
+        if len(tags) < len(names):
+            existing = set(names) - {tag.name for tag in tags}
+            result = await session.exec(select(Tag).where(Tag.name.in_(existing)))
+            tags += result.all()
+        return sorted(tags, key=lambda tag: tag.name)
+
+    @staticmethod
+    async def add_tags_to_book(book_id: int, user_id: int, names: List[str], session: AsyncSession):
+        """Tag an owned book, returns the tags or None if the book isn't found or owned."""
+        statement = select(Book.id).where(Book.id == book_id, Book.user_id == user_id)
+        result = await session.exec(statement)
+
+        if result.first() is None:
+            return None
+
+        tags = await TagService.upsert_tags(names, session)
+        timestamp = get_timestamp()
+        links = [{"book_id": book_id, "tag_id": tag.id, "created_at": timestamp} for tag in tags]
+
+        await session.exec(pg_insert(BookTag).values(links).on_conflict_do_nothing())
+        await session.commit()
+        return tags
+
+    @staticmethod
+    async def remove_tag_from_book(book_id: int, tag_id: int, user_id: int, session: AsyncSession):
+        owned = select(Book.id).where(Book.id == book_id, Book.user_id == user_id).exists()
+        statement = delete(BookTag).where(BookTag.book_id == book_id, BookTag.tag_id == tag_id, owned).returning(BookTag.tag_id)
+        result = await session.exec(statement, execution_options={"synchronize_session": False})
+        deleted_id = result.scalars().first()
+        await session.commit()
+        return deleted_id is not None
+
+    @staticmethod
+    async def get_books_by_tags(names: List[str], match: Literal["any", "all"], limit: int, after: tuple | None, session: AsyncSession):
+        """Books tagged with any or all of the names, resolved through the (tag_id, book_id) index."""
+        names = set(names)
+        book_ids = select(BookTag.book_id).join(Tag, Tag.id == BookTag.tag_id).where(Tag.name.in_(names))
+
+        if match == "all":
+            book_ids = book_ids.group_by(BookTag.book_id).having(func.count() == len(names))
+
+        statement = select(Book).where(Book.id.in_(book_ids))
+        return await BookService.paginate_books(statement, limit, after, session)
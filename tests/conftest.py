@@ -0,0 +1,33 @@
+"""Integration tests run the app against DATABASE_URL and REDIS_URL from the environment or .env.
+
+The database must be migrated. Tests that need the app are skipped when they aren't configured or reachable.
+"""
+from pydantic import ValidationError
+import os
+import pytest
+
+os.environ.setdefault("LOG_LEVEL", "WARNING")
+os.environ.setdefault("LOG_ACCESS_LEVEL", "WARNING")
+# Keep the background health probe from running queries in the middle of a test
+os.environ.setdefault("HEALTH_PROBE_INTERVAL", "3600")
+
+
+@pytest.fixture(scope="session")
+def client():
+    try:
+        from src.app import app
+    except ValidationError as e:
+        pytest.skip(f"Settings are incomplete: {e.error_count()} errors")
+
+    from fastapi.testclient import TestClient
+
+    # Trusted hosts only accept known names
+    test_client = TestClient(app, base_url="http://localhost")
+
+    try:
+        test_client.__enter__()
+    except Exception as e:
+        pytest.skip(f"Database or Redis is unreachable: {e}")
+
+    yield test_client
+    test_client.__exit__(None, None, None)
@@ -0,0 +1,102 @@
+"""SQL statements issued per endpoint, so relationship loading can't silently grow into N+1 queries."""
+from sqlalchemy import event
+from sqlmodel import delete
+import datetime
+import pytest
+import uuid
+
+BOOKS = 3
+REVIEWS_PER_BOOK = 2
+
+
+@pytest.fixture(scope="module")
+def statements(client):
+    from src.db.main import async_engine
+
+    executed = []
+
+    def record(connection, cursor, statement, *args):
+        executed.append(statement)
+
+    event.listen(async_engine.sync_engine, "before_cursor_execute", record)
+    yield executed
+    event.remove(async_engine.sync_engine, "before_cursor_execute", record)
+
+
+@pytest.fixture(scope="module")
+def library(client):
+    """A user with a few books, each reviewed a few times, and an access token for them."""
+    from src.db.main import async_session
+    from src.db.models import Book, Review, User
+    from src.db.redis import redis_client
+    from src.lib.utils import encode_jwt_token, generate_ids
+
+    user_id, *ids = generate_ids(1 + BOOKS + BOOKS * REVIEWS_PER_BOOK)
+    book_ids, review_ids = ids[:BOOKS], ids[BOOKS:]
+    token = encode_jwt_token(user_id=user_id, token_type="access")
+
+    async def seed():
+        async with async_session() as session:
+            session.add(User(id=user_id, name="Query Count", email=f"query.count.{uuid.uuid4().hex[:8]}@test.local", password="-"))
+            await session.commit()
+
+            session.add_all(
+                Book(id=book_id, title=f"Book {book_id}", author="Author", publisher="Publisher", published=datetime.date(2020, 1, 1),
+                     pages=100, language="en", description="Query count test book", user_id=user_id)
+                for book_id in book_ids
+            )
+            await session.commit()
+
+            session.add_all(
+                Review(id=review_id, rating=4, review="Good", user_id=user_id, book_id=book_ids[index % BOOKS])
+                for index, review_id in enumerate(review_ids)
+            )
+            await session.commit()
+
+        # Access tokens are only accepted while the user has a refresh token
+        await redis_client.set(f"refresh:{user_id}", "-", ex=600)
+
+    async def cleanup():
+        async with async_session() as session:
+            await session.exec(delete(Review).where(Review.id.in_(review_ids)))
+            await session.exec(delete(Book).where(Book.id.in_(book_ids)))
+            await session.exec(delete(User).where(User.id == user_id))
+            await session.commit()
+
+        await redis_client.delete(f"refresh:{user_id}", f"user:{user_id}")
+
+    client.portal.call(seed)
+    yield {"user_id": user_id, "book_id": book_ids[0], "headers": {"Authorization": f"Bearer {token}"}}
+    client.portal.call(cleanup)
+
+
+def count_statements(client, statements, library: dict, path: str) -> int:
+    from src.books.services import BookService
+
+    # Cached endpoints are measured on a miss
+    client.portal.call(BookService.invalidate_cache, library["book_id"])
+    statements.clear()
+
+    response = client.get(path.format(**library), headers=library["headers"])
+    assert response.status_code == 200, response.text
+    return len(statements)
+
+
+@pytest.mark.parametrize("path, expected", [
+    ("/api/v1/books/{book_id}", 1),
+    ("/api/v1/books/", 1),
+    ("/api/v1/books/user/{user_id}", 1),
+    ("/api/v1/reviews/book/{book_id}", 2),
+    ("/api/v1/auth/all-info", 3),
+])
+def test_statements_per_endpoint(client, statements, library, path, expected):
+    assert count_statements(client, statements, library, path) == expected
+
+
+def test_cached_book_needs_no_statements(client, statements, library):
+    count_statements(client, statements, library, "/api/v1/books/{book_id}")
+    statements.clear()
+
+    response = client.get(f"/api/v1/books/{library['book_id']}", headers=library["headers"])
+    assert response.status_code == 200, response.text
+    assert statements == []